@@ -29,7 +29,7 @@ from logic.video_processing import (
     extract_and_save_frames,
     analyze_frames_with_blip
 )
-from logic.nutrition_calculator import NutritionCalculator
+from logic.nutrition_calculator import get_shared_calculator
 from core.database import db
 from logic.job_queue import enqueue_nutrition_compute
 
@@ -91,13 +91,16 @@ async def nutrition_recompute_errors():
         cur.execute("SELECT recipe_id FROM nutrition_snapshots WHERE status='error'")
         ids = [r[0] for r in cur.fetchall()]
         con.close()
-        import asyncio
+        queued = 0
         for rid in ids:
             try:
-                await enqueue_nutrition_compute(int(rid))
+                if not await enqueue_nutrition_compute(int(rid), force=True):
+                    # Queue full: the rest stay in status=error for a later run
+                    break
+                queued += 1
             except Exception:
                 continue
-        return {"queued": len(ids)}
+        return {"queued": queued}
     except Exception as e:
         logger.error(f"nutrition_recompute_errors error: {e}")
         raise HTTPException(status_code=500, detail="recompute-errors failed")
@@ -243,10 +246,7 @@ async def update_saved_recipe_api(request: Request, recipe_id: int, payload: Upd
     try:
         from models.types import RecipeContent
         validated = RecipeContent.model_validate(payload.recipe_content or {})
-        with db.get_connection() as conn:
-            c = conn.cursor()
-            c.execute("UPDATE saved_recipes SET recipe_content = ? WHERE id = ? AND user_id = ?", (validated.model_dump_json(), recipe_id, owner_id))
-            conn.commit()
+        db.update_recipe_content(recipe_id, owner_id, validated)
         updated = db.get_saved_recipe(recipe_id)
         # attempt: if collection id provided as query param and collection has no image, adopt
         try:
@@ -1550,9 +1550,10 @@ async def list_recipe_variants(recipe_id: int, request: Request, sort: str = 'ne
         # attach owner display name
         for it in sliced:
             try:
-                c = db.get_connection().cursor()
-                c.execute("SELECT username, full_name FROM users WHERE id = ?", (it['userId'],))
-                row = c.fetchone()
+                with db.get_connection() as conn:
+                    c = conn.cursor()
+                    c.execute("SELECT username, full_name FROM users WHERE id = ?", (it['userId'],))
+                    row = c.fetchone()
                 it['owner'] = {'id': it['userId'], 'username': row[0] if row and row[0] else None, 'displayName': (row[0] or (row[1] if row else None))}
             except Exception:
                 it['owner'] = {'id': it['userId'], 'username': None, 'displayName': None}
@@ -2561,7 +2562,7 @@ async def calculate_nutrition(request: NutritionCalcRequest):
             logging.warning(f"persist recipe_ingredients failed: {_e_persist}")
 
         # Use real USDA integration
-        calculator = NutritionCalculator()
+        calculator = get_shared_calculator()
         result = await calculator.calculate_nutrition(request.ingredients, request.servings, recipe_id=request.recipeId)
 
         # Concise, human-readable summary instead of dumping entire object
@@ -2673,11 +2674,8 @@ async def recompute_nutrition_snapshot(recipe_id: int):
             db.upsert_nutrition_snapshot(recipe_id, status="pending", snapshot=None, meta={"reason": "manual_recompute"})
         except Exception:
             pass
-        try:
-            import asyncio
-            asyncio.create_task(enqueue_nutrition_compute(int(recipe_id)))
-        except Exception:
-            pass
+        if not await enqueue_nutrition_compute(int(recipe_id), force=True):
+            return JSONResponse(status_code=429, content={"ok": False, "status": "queue_full"})
         return {"ok": True, "status": "pending"}
     except Exception as e:
         logger.error(f"recompute_nutrition_snapshot error: {e}")
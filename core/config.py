@@ -7,12 +7,19 @@ from logging.handlers import RotatingFileHandler
 from datetime import datetime, timedelta
 import shutil
 
+# Base directory of the project
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# Directory for storing generated PDF files (and the job debug log)
+OUTPUT_DIR = BASE_DIR / "output"
+OUTPUT_DIR.mkdir(exist_ok=True)
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s [%(levelname)s] %(message)s',
     handlers=[
-        logging.FileHandler('output/job_debug.log'),
+        logging.FileHandler(OUTPUT_DIR / 'job_debug.log'),
         logging.StreamHandler()
     ]
 )
@@ -52,9 +59,6 @@ def setup_logging():
     logging.info("Logging re-configured to use console and app.log")
 
 
-# Base directory of the project
-BASE_DIR = Path(__file__).resolve().parent.parent
-
 # Directory for storing downloaded videos
 DOWNLOADS_DIR = BASE_DIR / "downloads"
 DOWNLOADS_DIR.mkdir(exist_ok=True)
@@ -63,10 +67,6 @@ DOWNLOADS_DIR.mkdir(exist_ok=True)
 FRAMES_DIR = BASE_DIR / "frames"
 FRAMES_DIR.mkdir(exist_ok=True)
 
-# Directory for storing generated PDF files
-OUTPUT_DIR = BASE_DIR / "output"
-OUTPUT_DIR.mkdir(exist_ok=True)
-
 # In-memory storage for job status and results
 jobs: Dict[str, Dict[str, Any]] = {}
 
@@ -189,5 +189,7 @@ class Settings:
     youtube_api_key: str = os.getenv("YOUTUBE_API_KEY", "")
     google_client_id: str = os.getenv("GOOGLE_CLIENT_ID", "")
     google_client_secret: str = os.getenv("GOOGLE_CLIENT_SECRET", "")
+    # Origin prepended to stored media paths (/images, /downloads, /static); empty serves them relative
+    MEDIA_BASE_URL: str = os.getenv("MEDIA_BASE_URL", "http://127.0.0.1:8001").rstrip("/")
 
 settings = Settings() 
\ No newline at end of file
@@ -1,28 +1,434 @@
+import base64
 import sqlite3
+import queue
+import re
+import string
+import threading
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Optional, List
+from typing import Iterator, Optional, List
 from pathlib import Path
+from pydantic import ValidationError
 from models.types import User, UserCreate, UserInDB, SavedRecipe, RecipeContent
 import logging
 import json
+import orjson
+import os
+from core.config import settings
 from core.password import verify_password, get_password_hash, needs_rehash
 
 logger = logging.getLogger(__name__)
 DB_PATH = Path("users.db")
 
+# Number of read-only connections kept open for concurrent readers
+READ_POOL_SIZE = 4
+
+# Prepared statements kept per connection. The stdlib sqlite3 module cannot mark
+# statements SQLITE_PREPARE_PERSISTENT, so hot SQL stays prepared by living on
+# long-lived pooled connections and being sent as identical module-level text.
+STATEMENT_CACHE_SIZE = 256
+
+# Idle connections kept around for get_connection() callers
+CONNECTION_POOL_SIZE = 8
+
+# Columns aliased as "name [timestamp]" come back as datetime objects (PARSE_COLNAMES)
+sqlite3.register_converter("timestamp", lambda raw: datetime.fromisoformat(raw.decode()))
+
+# Hot queries are kept as constant SQL text so sqlite3's per-connection
+# statement cache can reuse the prepared statement across calls.
+# Column order matches the positional unpacking in the saved recipe listings
+_SAVED_RECIPES_SELECT = """
+    SELECT sr.id, sr.user_id, sr.source_url, sr.recipe_content, sr.created_at AS "created_at [timestamp]",
+           u.username, u.full_name, u.avatar_url
+    FROM saved_recipes sr
+    LEFT JOIN users u ON u.id = sr.user_id
+"""
+_ORDER_LATEST = " ORDER BY sr.created_at DESC"
+_ORDER_RATING_DESC = " ORDER BY sr.rating_average DESC, sr.rating_count DESC, sr.created_at DESC"
+_ORDER_COUNT_DESC = " ORDER BY sr.rating_count DESC, sr.rating_average DESC, sr.created_at DESC"
+
+SQL_USER_RECIPES_LATEST = _SAVED_RECIPES_SELECT + " WHERE sr.user_id = ?" + _ORDER_LATEST
+SQL_USER_RECIPES_RATING_DESC = _SAVED_RECIPES_SELECT + " WHERE sr.user_id = ?" + _ORDER_RATING_DESC
+SQL_USER_RECIPES_COUNT_DESC = _SAVED_RECIPES_SELECT + " WHERE sr.user_id = ?" + _ORDER_COUNT_DESC
+_USER_RECIPES_SQL_BY_SORT = {
+    'rating_desc': SQL_USER_RECIPES_RATING_DESC,
+    'rating_count_desc': SQL_USER_RECIPES_COUNT_DESC,
+}
+
+SQL_ALL_RECIPES_LATEST = _SAVED_RECIPES_SELECT + _ORDER_LATEST
+SQL_ALL_RECIPES_RATING_DESC = _SAVED_RECIPES_SELECT + _ORDER_RATING_DESC
+SQL_ALL_RECIPES_COUNT_DESC = _SAVED_RECIPES_SELECT + _ORDER_COUNT_DESC
+_ALL_RECIPES_SQL_BY_SORT = {
+    'rating_desc': SQL_ALL_RECIPES_RATING_DESC,
+    'rating_count_desc': SQL_ALL_RECIPES_COUNT_DESC,
+}
+
+# Response keys for list_tag_history, in SELECT column order
+_TAG_HISTORY_KEYS = ("id", "userId", "userName", "action", "tagId", "keyword", "details", "createdAt")
+
+_RATING_AGGREGATE_SQL = """
+    UPDATE saved_recipes SET
+        rating_count = (SELECT COUNT(*) FROM ratings WHERE recipe_id = saved_recipes.id),
+        rating_average = COALESCE((SELECT ROUND(AVG(CAST(value AS FLOAT)), 2) FROM ratings WHERE recipe_id = saved_recipes.id), 0)
+    WHERE id = {recipe_id};
+"""
+
+# User row plus its roles folded into one column; callers append "WHERE ... GROUP BY u.id"
+SQL_USER_WITH_ROLES = (
+    "SELECT u.*, GROUP_CONCAT(r.role) AS roles FROM users u "
+    "LEFT JOIN user_roles r ON r.user_id = u.id "
+)
+
+
+def _user_fields(row: sqlite3.Row) -> dict:
+    """Model kwargs for a SQL_USER_WITH_ROLES row; pydantic coerces is_active/created_at itself."""
+    fields = dict(row)
+    fields['roles'] = [r for r in (fields['roles'] or '').split(',') if r]
+    return fields
+
+
+# Hot comment/rating statements, shared so every call hits the per-connection statement cache
+SQL_RATING_SUMMARY = "SELECT rating_average, rating_count FROM saved_recipes WHERE id = ?"
+SQL_UPSERT_RATING = (
+    "INSERT INTO ratings (recipe_id, user_id, value) VALUES (?, ?, ?) "
+    "ON CONFLICT(recipe_id, user_id) DO UPDATE SET value = excluded.value, updated_at = CURRENT_TIMESTAMP"
+)
+SQL_USER_RATING = "SELECT value FROM ratings WHERE recipe_id = ? AND user_id = ?"
+# Simple banned words filter for comment bodies: links and script tags, one case-insensitive pass
+_BANNED_COMMENT_RE = re.compile(r"https?://|</?script", re.IGNORECASE)
+
+
+def _validate_comment_body(body: Optional[str]) -> str:
+    """Strip a comment body and check its length and banned content before any connection is taken."""
+    body = (body or '').strip()
+    if not 1 <= len(body) <= 2000:
+        raise ValueError("Comment length must be 1-2000 characters")
+    if _BANNED_COMMENT_RE.search(body):
+        raise ValueError("Comment contains forbidden content")
+    return body
+
+
+# Comment page cursors are base64 of "createdAt|id"; anything else is ignored
+_COMMENT_CURSOR_RE = re.compile(r'^(?:[A-Za-z0-9+/]{4})*(?:[A-Za-z0-9+/]{2}==|[A-Za-z0-9+/]{3}=)?$')
+
+
+def _decode_comment_cursor(after_cursor: Optional[str]):
+    """Return (created_after, id_after) from a list_comments cursor, or (None, None) when it is malformed."""
+    if not after_cursor or not _COMMENT_CURSOR_RE.match(after_cursor):
+        return None, None
+    created_after, _, id_s = base64.b64decode(after_cursor).decode('utf-8', 'replace').partition('|')
+    return created_after, (int(id_s) if id_s.isdigit() else None)
+
+
+SQL_COMMENT_LIKES_COUNT = "SELECT COUNT(*) FROM comment_likes WHERE comment_id = ?"
+SQL_COMMENT_LIKED_BY = "SELECT 1 FROM comment_likes WHERE comment_id = ? AND user_id = ?"
+SQL_COMMENT_LIKE_INSERT = "INSERT INTO comment_likes (comment_id, user_id) VALUES (?, ?) ON CONFLICT DO NOTHING RETURNING 1"
+SQL_COMMENT_LIKE_DELETE = "DELETE FROM comment_likes WHERE comment_id = ? AND user_id = ?"
+
+SQL_SEARCH_TAGS = "SELECT id, keyword, type FROM tags WHERE active=1 AND keyword LIKE ? ORDER BY type, keyword"
+SQL_SEARCH_TAGS_FTS = (
+    "SELECT id, keyword, type FROM tags WHERE active=1 "
+    "AND id IN (SELECT rowid FROM tags_fts WHERE tags_fts MATCH ?) ORDER BY type, keyword"
+)
+SQL_LIST_TAGS = "SELECT id, keyword, type FROM tags WHERE active=1 ORDER BY type, keyword"
+
+# Media served by this backend is stored as a server-relative path (e.g. /images/x.png)
+# and prefixed with settings.MEDIA_BASE_URL on read.
+_MEDIA_PREFIXES = ('/static/', '/downloads/', '/images/')
+_LOCAL_MEDIA_ORIGIN_RE = re.compile(r'^http://(?:127\.0\.0\.1|localhost):80\d\d(?=/(?:static|downloads|images)/)')
+
+
+def _to_media_path(url):
+    """Strip a local backend or MEDIA_BASE_URL origin so only the server-relative path is stored."""
+    if not isinstance(url, str):
+        return url
+    base = settings.MEDIA_BASE_URL
+    if base and url.startswith(base) and url[len(base):].startswith(_MEDIA_PREFIXES):
+        return url[len(base):]
+    return _LOCAL_MEDIA_ORIGIN_RE.sub('', url)
+
+
+def _to_media_url(path):
+    base = settings.MEDIA_BASE_URL
+    if base and isinstance(path, str) and path.startswith(_MEDIA_PREFIXES):
+        return f"{base}{path}"
+    return path
+
+
+def _expand_media_urls(content: RecipeContent) -> RecipeContent:
+    if not settings.MEDIA_BASE_URL:
+        return content
+    content.image_url = _to_media_url(content.image_url)
+    content.thumbnail_path = _to_media_url(content.thumbnail_path)
+    for inst in content.instructions:
+        if inst.image_path:
+            inst.image_path = _to_media_url(inst.image_path)
+    return content
+
+
+def _relativize_media_urls(content: RecipeContent) -> RecipeContent:
+    content.image_url = _to_media_path(content.image_url)
+    content.thumbnail_path = _to_media_path(content.thumbnail_path)
+    for inst in content.instructions:
+        if inst.image_path:
+            inst.image_path = _to_media_path(inst.image_path)
+    return content
+
+
+def _parse_recipe_content(raw) -> RecipeContent:
+    """Validate stored recipe JSON straight from bytes and expand media paths."""
+    data = raw.encode() if isinstance(raw, str) else raw
+    try:
+        content = RecipeContent.model_validate_json(data)
+    except ValidationError:
+        content = None
+    if content is not None:
+        image = content.image_url or content.thumbnail_path
+    if content is None or (not image and b'"img"' in data):
+        # Dict path for rows the model rejects or that still use the legacy `img` key
+        content_dict = orjson.loads(data)
+        image = content_dict.get('image_url') or content_dict.get('img') or content_dict.get('thumbnail_path')
+        content = RecipeContent.model_validate(content_dict)
+    if image:
+        content.image_url = image
+        content.thumbnail_path = image
+    return _expand_media_urls(content)
+
+class _KeywordTable(dict):
+    """str.translate table for tag keywords: folds A-Z to a-z and deletes every
+    other character, including code points outside the precomputed Latin-1 range."""
+
+    def __missing__(self, code):
+        return None
+
+
+_KEYWORD_XLAT = _KeywordTable({c: None for c in range(256)})
+_KEYWORD_XLAT.update({ord(c): c for c in string.ascii_lowercase + string.digits})
+_KEYWORD_XLAT.update({ord(c): c.lower() for c in string.ascii_uppercase})
+
+# Bump whenever init_database changes, so existing databases re-run the migration
+CURRENT_MIGRATION = 8
+
+# Applied once to every connection when it is opened. journal_mode is not listed:
+# WAL is persistent in the database file, so only the writer sets it.
+_CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-64000",
+    "PRAGMA mmap_size=268435456",
+)
+
+class _PooledConnection:
+    """Proxy for a pooled sqlite3 connection handed out by get_connection().
+
+    Behaves like the underlying connection, but close() (or leaving a `with`
+    block) returns it to the pool instead of closing it. Leaving a `with` block
+    does not commit: writers call conn.commit() themselves, and anything still
+    uncommitted is rolled back on release, so read-only blocks never touch the
+    write lock. A handle dropped without close() is discarded rather than
+    returned, since a cursor taken from it may still be using the connection.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, pool: queue.Queue):
+        self._conn = conn
+        self._pool = pool
+
+    def __getattr__(self, name):
+        conn = self.__dict__.get('_conn')
+        if conn is None:
+            raise sqlite3.ProgrammingError("Cannot operate on a closed database.")
+        return getattr(conn, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def close(self):
+        conn, self._conn = self._conn, None
+        if conn is None:
+            return
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            self._pool.put_nowait(conn)
+        except (queue.Full, sqlite3.Error):
+            conn.close()
+
+    def __del__(self):
+        if self.__dict__.get('_conn') is not None:
+            # Never pooled: sqlite3 closes (and rolls back) the connection once no cursor references it
+            logger.warning("get_connection() handle collected without close(); its connection is discarded")
+
+
 class DatabaseManager:
+    _initialized = False
+
     def __init__(self):
         self.db_path = DB_PATH
-        self.init_database()
-
-    def get_connection(self):
-        conn = sqlite3.connect(self.db_path)
+        # One long-lived writer (serialized by a lock) plus a small pool of
+        # read-only connections, so SQLite's page cache survives across calls.
+        self._write_lock = threading.RLock()
+        self._local = threading.local()
+        self._write_conn = self._open()
+        if not DatabaseManager._initialized:
+            self.init_database()
+            DatabaseManager._initialized = True
+        self._read_pool: queue.Queue = queue.Queue()
+        for _ in range(READ_POOL_SIZE):
+            self._read_pool.put(self._open(read_only=True))
+        # Idle connections for get_connection() callers, opened lazily and reused LIFO
+        self._conn_pool: queue.LifoQueue = queue.LifoQueue(maxsize=CONNECTION_POOL_SIZE)
+        # Normalized keyword/alias -> tag id; the tag vocabulary is small and rarely changes
+        self._tag_cache_lock = threading.Lock()
+        self._tag_id_by_key: dict[str, int] = {}
+        self._reload_tag_cache()
+        # The users schema only changes during migrations, which run above
+        with self._acquire_read() as conn:
+            self._user_cols = frozenset(row[1] for row in conn.execute("PRAGMA table_info(users)"))
+        # SELECT ... FROM for comment DTO rows joined with the author, built once so every
+        # comment query sends identical text; only user columns the schema has are selected
+        self._comment_has_avatar = 'avatar_url' in self._user_cols
+        self._comment_has_username = 'username' in self._user_cols
+        comment_cols = (
+            "SELECT c.id, c.recipe_id, c.user_id, c.body, c.deleted, c.parent_id, "
+            "c.created_at, c.updated_at, u.full_name AS user_full_name"
+            + (", u.avatar_url AS user_avatar" if self._comment_has_avatar else "")
+            + (", u.username AS user_username" if self._comment_has_username else "")
+        )
+        comment_from = " FROM comments c JOIN users u ON u.id = c.user_id"
+        self._comment_by_id_sql = comment_cols + comment_from + " WHERE c.id = ?"
+        # The same row shape for INSERT/UPDATE ... RETURNING, with author fields as subqueries
+        author = "(SELECT {} FROM users WHERE users.id = comments.user_id) AS {}"
+        self._comment_returning_sql = (
+            "RETURNING id, recipe_id, user_id, body, deleted, parent_id, created_at, updated_at, "
+            + author.format("full_name", "user_full_name")
+            + (", " + author.format("avatar_url", "user_avatar") if self._comment_has_avatar else "")
+            + (", " + author.format("username", "user_username") if self._comment_has_username else "")
+        )
+        # Page rows carry their like count and the viewer's like (first parameter) inline
+        self._comment_page_sql = (
+            comment_cols
+            + ", (SELECT COUNT(*) FROM comment_likes l WHERE l.comment_id = c.id) AS likes_count"
+            + ", EXISTS(SELECT 1 FROM comment_likes l WHERE l.comment_id = c.id AND l.user_id = ?) AS liked_by_me"
+            + comment_from
+        )
+
+    def _configure(self, conn: sqlite3.Connection) -> sqlite3.Connection:
         conn.row_factory = sqlite3.Row
+        for pragma in _CONNECTION_PRAGMAS:
+            conn.execute(pragma)
         return conn
 
+    def _open(self, read_only: bool = False) -> sqlite3.Connection:
+        if read_only:
+            conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False,
+                                   cached_statements=STATEMENT_CACHE_SIZE, detect_types=sqlite3.PARSE_COLNAMES)
+        else:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE,
+                                   detect_types=sqlite3.PARSE_COLNAMES)
+            # Enforced on the pooled writer only: get_connection() callers in api/ still delete
+            # saved recipes without clearing their child rows first
+            conn.execute("PRAGMA foreign_keys=ON")
+            conn.execute("PRAGMA journal_mode=WAL")
+        return self._configure(conn)
+
+    def get_connection(self) -> "_PooledConnection":
+        """Hand out a caller-owned connection from the shared pool. close() or leaving
+        a `with` block returns it. Internal methods use `_acquire_read` /
+        `_acquire_write` instead."""
+        try:
+            conn = self._conn_pool.get_nowait()
+        except queue.Empty:
+            conn = self._configure(sqlite3.connect(self.db_path, check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE))
+        return _PooledConnection(conn, self._conn_pool)
+
+    @contextmanager
+    def _acquire_write(self):
+        """Yield the shared writer connection; commits on success, rolls back on error.
+
+        The outermost level opens the transaction with BEGIN IMMEDIATE, so every
+        statement in the block (and in nested writes) lands in a single commit and
+        the write lock is taken up front instead of upgrading mid-transaction.
+        """
+        with self._write_lock:
+            depth = getattr(self._local, 'write_depth', 0)
+            self._local.write_depth = depth + 1
+            conn = self._write_conn
+            try:
+                if depth == 0 and not conn.in_transaction:
+                    conn.execute("BEGIN IMMEDIATE")
+                yield conn
+                if depth == 0:
+                    conn.commit()
+            except BaseException:
+                if depth == 0:
+                    conn.rollback()
+                raise
+            finally:
+                self._local.write_depth = depth
+
+    @contextmanager
+    def _acquire_read(self):
+        """Yield a read-only connection from the pool. Nested reads on the same
+        thread reuse the connection already held, and reads issued while the
+        thread holds the writer go through the writer so they see its changes."""
+        if getattr(self._local, 'write_depth', 0):
+            yield self._write_conn
+            return
+        held = getattr(self._local, 'read_conn', None)
+        if held is not None:
+            yield held
+            return
+        conn = self._read_pool.get()
+        self._local.read_conn = conn
+        try:
+            yield conn
+        finally:
+            self._local.read_conn = None
+            if conn.in_transaction:
+                conn.rollback()
+            self._read_pool.put(conn)
+
+    def _migration_is_current(self, cursor) -> bool:
+        """True when this database was already migrated to CURRENT_MIGRATION and
+        its schema has not changed since (per PRAGMA schema_version)."""
+        cursor.execute("CREATE TABLE IF NOT EXISTS _migration_state (version INTEGER, schema_version INTEGER)")
+        row = cursor.execute("SELECT version, schema_version FROM _migration_state").fetchone()
+        schema_version = cursor.execute("PRAGMA schema_version").fetchone()[0]
+        return bool(row) and row[0] == CURRENT_MIGRATION and row[1] == schema_version
+
+    def _store_migration_state(self, cursor):
+        schema_version = cursor.execute("PRAGMA schema_version").fetchone()[0]
+        cursor.execute("DELETE FROM _migration_state")
+        cursor.execute("INSERT INTO _migration_state (version, schema_version) VALUES (?, ?)", (CURRENT_MIGRATION, schema_version))
+
+    def _add_missing_columns(self, cursor, table: str, columns: dict) -> set:
+        """ALTER TABLE ADD COLUMN for each entry of `columns` (name -> declaration) the
+        table lacks. Existence is filtered inside SQLite; returns the names added."""
+        placeholders = ",".join("?" * len(columns))
+        cursor.execute(
+            f"SELECT name FROM pragma_table_info(?) WHERE name IN ({placeholders})",
+            (table, *columns),
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+        added = set()
+        for name in (n for n in columns if n not in existing):
+            try:
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {columns[name]}")
+                added.add(name)
+            except sqlite3.OperationalError as e:
+                logger.warning(f"Adding {table}.{name} failed: {e}")
+        return added
+
     def init_database(self):
-        with self.get_connection() as conn:
+        with self._acquire_write() as conn:
             cursor = conn.cursor()
+            if self._migration_is_current(cursor):
+                logger.info("Database schema is current, skipping migrations")
+                return
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS users (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -38,29 +444,24 @@ class DatabaseManager:
                 )
             """)
             # Ensure new columns exist for already-created databases
-            cursor.execute("PRAGMA table_info(users)")
-            user_cols = {row[1] for row in cursor.fetchall()}
-            if 'username' not in user_cols:
+            added = self._add_missing_columns(cursor, 'users', {
+                'username': 'TEXT',
+                'avatar_url': 'TEXT',
+                'google_id': 'TEXT',
+                'auth_provider': "TEXT DEFAULT 'email'",
+                'is_active': 'BOOLEAN DEFAULT 1',
+                'created_at': 'TIMESTAMP DEFAULT CURRENT_TIMESTAMP',
+                # Optional profile fields
+                'location': 'TEXT',
+                'instagram_url': 'TEXT',
+                'youtube_url': 'TEXT',
+                'facebook_url': 'TEXT',
+                'tiktok_url': 'TEXT',
+                'website_url': 'TEXT',
+            })
+            if 'username' in added:
                 # SQLite cannot add a UNIQUE constraint via ALTER TABLE
-                cursor.execute("ALTER TABLE users ADD COLUMN username TEXT")
                 cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_users_username ON users(username)")
-            if 'avatar_url' not in user_cols:
-                cursor.execute("ALTER TABLE users ADD COLUMN avatar_url TEXT")
-            if 'google_id' not in user_cols:
-                cursor.execute("ALTER TABLE users ADD COLUMN google_id TEXT")
-            if 'auth_provider' not in user_cols:
-                cursor.execute("ALTER TABLE users ADD COLUMN auth_provider TEXT DEFAULT 'email'")
-            if 'is_active' not in user_cols:
-                cursor.execute("ALTER TABLE users ADD COLUMN is_active BOOLEAN DEFAULT 1")
-            if 'created_at' not in user_cols:
-                cursor.execute("ALTER TABLE users ADD COLUMN created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP")
-            # New optional profile fields
-            for col in ['location','instagram_url','youtube_url','facebook_url','tiktok_url','website_url']:
-                if col not in user_cols:
-                    try:
-                        cursor.execute(f"ALTER TABLE users ADD COLUMN {col} TEXT")
-                    except Exception:
-                        pass
             # Roles mapping
             cursor.execute(
                 """
@@ -98,14 +499,14 @@ class DatabaseManager:
                 )
             """)
             # Ensure new columns exist (for migrated DBs)
-            cursor.execute("PRAGMA table_info(saved_recipes)")
-            cols = [row[1] for row in cursor.fetchall()]
-            if 'rating_average' not in cols:
-                cursor.execute("ALTER TABLE saved_recipes ADD COLUMN rating_average REAL DEFAULT 0")
-            if 'rating_count' not in cols:
-                cursor.execute("ALTER TABLE saved_recipes ADD COLUMN rating_count INTEGER DEFAULT 0")
-            if 'likes_count' not in cols:
-                cursor.execute("ALTER TABLE saved_recipes ADD COLUMN likes_count INTEGER DEFAULT 0")
+            self._add_missing_columns(cursor, 'saved_recipes', {
+                'rating_average': 'REAL DEFAULT 0',
+                'rating_count': 'INTEGER DEFAULT 0',
+                'likes_count': 'INTEGER DEFAULT 0',
+            })
+            # Cover the per-user listing orders in get_user_saved_recipes
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_saved_recipes_user_created ON saved_recipes(user_id, created_at DESC)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_saved_recipes_user_rating ON saved_recipes(user_id, rating_average DESC, rating_count DESC)")
 
             # Ratings table
             cursor.execute(
@@ -125,6 +526,17 @@ class DatabaseManager:
             )
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_ratings_recipe_id ON ratings(recipe_id)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_ratings_recipe_value ON ratings(recipe_id, value)")
+            # saved_recipes.rating_average/rating_count are maintained by these triggers in the
+            # rating's own transaction; each recomputes from the covering (recipe_id, value) index
+            for name, event, body in (
+                ('trg_ratings_ai', 'AFTER INSERT', _RATING_AGGREGATE_SQL.format(recipe_id='NEW.recipe_id')),
+                ('trg_ratings_ad', 'AFTER DELETE', _RATING_AGGREGATE_SQL.format(recipe_id='OLD.recipe_id')),
+                ('trg_ratings_au', 'AFTER UPDATE OF value, recipe_id',
+                 _RATING_AGGREGATE_SQL.format(recipe_id='OLD.recipe_id') + _RATING_AGGREGATE_SQL.format(recipe_id='NEW.recipe_id')),
+            ):
+                cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {event} ON ratings BEGIN {body} END")
+            # Backfill every recipe once so rows rated before the triggers existed are in sync
+            cursor.execute(_RATING_AGGREGATE_SQL.format(recipe_id='saved_recipes.id'))
 
             # Recipe likes table
             cursor.execute(
@@ -187,11 +599,21 @@ class DatabaseManager:
                     user_id INTEGER NOT NULL,
                     reason TEXT,
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    UNIQUE(comment_id, user_id),
                     FOREIGN KEY (comment_id) REFERENCES comments (id),
                     FOREIGN KEY (user_id) REFERENCES users (id)
                 )
                 """
             )
+            # Older DBs lack the UNIQUE constraint: drop duplicate reports and add it as an index
+            try:
+                cursor.execute(
+                    "DELETE FROM comment_reports WHERE id NOT IN "
+                    "(SELECT MIN(id) FROM comment_reports GROUP BY comment_id, user_id)"
+                )
+                cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_comment_reports_comment_user ON comment_reports(comment_id, user_id)")
+            except Exception as _rep_err:
+                logger.warning(f"comment_reports unique index failed: {_rep_err}")
 
             # --- Nutrition snapshots for fast recipe page loads ---
             cursor.execute(
@@ -218,6 +640,20 @@ class DatabaseManager:
                 """
             )
 
+            # --- USDA FDC search results per normalized query; NULL fdc_id caches "no match" ---
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS fdc_search_cache (
+                    query TEXT PRIMARY KEY,
+                    fdc_id INTEGER,
+                    description TEXT,
+                    data_type TEXT,
+                    score REAL,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+                """
+            )
+
             # --- Density catalog (learned/fallback) ---
             cursor.execute(
                 """
@@ -265,13 +701,7 @@ class DatabaseManager:
                 """
             )
             # Ensure new column exists for already-created databases
-            cursor.execute("PRAGMA table_info(collection_recipes)")
-            cr_cols = {row[1] for row in cursor.fetchall()}
-            if 'position' not in cr_cols:
-                try:
-                    cursor.execute("ALTER TABLE collection_recipes ADD COLUMN position INTEGER")
-                except Exception:
-                    pass
+            self._add_missing_columns(cursor, 'collection_recipes', {'position': 'INTEGER'})
             cursor.execute(
                 """
                 CREATE TABLE IF NOT EXISTS collection_likes (
@@ -349,6 +779,9 @@ class DatabaseManager:
                 )
                 """
             )
+            # UNIQUE(recipe_id, tag_id) already serves recipe_id lookups; these add status and history ordering
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_recipe_tags_recipe_status ON recipe_tags(recipe_id, status)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_tag_change_log_recipe_created ON tag_change_log(recipe_id, created_at DESC, id DESC)")
             cursor.execute(
                 """
                 CREATE TABLE IF NOT EXISTS recipe_tag_locks (
@@ -362,6 +795,23 @@ class DatabaseManager:
                 )
                 """
             )
+            # Child-side FK columns not already the leading column of a key or index;
+            # without these every enforced parent check scans the child table
+            for index_name, table, column in (
+                ('idx_user_follows_followee', 'user_follows', 'followee_id'),
+                ('idx_ratings_user_id', 'ratings', 'user_id'),
+                ('idx_comments_user_id', 'comments', 'user_id'),
+                ('idx_comments_parent_id', 'comments', 'parent_id'),
+                ('idx_comment_likes_user_id', 'comment_likes', 'user_id'),
+                ('idx_comment_reports_user_id', 'comment_reports', 'user_id'),
+                ('idx_collections_owner_id', 'collections', 'owner_id'),
+                ('idx_collection_recipes_recipe_id', 'collection_recipes', 'recipe_id'),
+                ('idx_tag_synonyms_tag_id', 'tag_synonyms', 'tag_id'),
+                ('idx_recipe_tags_tag_id', 'recipe_tags', 'tag_id'),
+                ('idx_tag_change_log_user_id', 'tag_change_log', 'user_id'),
+                ('idx_tag_change_log_tag_id', 'tag_change_log', 'tag_id'),
+            ):
+                cursor.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table}({column})")
             # --- Canonical ingredients & translation tables ---
             cursor.execute(
                 """
@@ -406,18 +856,7 @@ class DatabaseManager:
                 """
             )
             # Ensure new columns exist for migrated DBs
-            cursor.execute("PRAGMA table_info(ingredient_translations)")
-            _it_cols = {row[1] for row in cursor.fetchall()}
-            if 'source' not in _it_cols:
-                try:
-                    cursor.execute("ALTER TABLE ingredient_translations ADD COLUMN source TEXT")
-                except Exception:
-                    pass
-            if 'confidence' not in _it_cols:
-                try:
-                    cursor.execute("ALTER TABLE ingredient_translations ADD COLUMN confidence REAL")
-                except Exception:
-                    pass
+            self._add_missing_columns(cursor, 'ingredient_translations', {'source': 'TEXT', 'confidence': 'REAL'})
             cursor.execute(
                 """
                 CREATE TABLE IF NOT EXISTS recipe_ingredients (
@@ -503,12 +942,42 @@ class DatabaseManager:
                     )
             except Exception as _seed_err:
                 logger.warning(f"Seeding canonical ingredients failed: {_seed_err}")
-            conn.commit()
             logger.info("Database initialized successfully")
 
             # Seed canonical tags once
             self._seed_canonical_tags(cursor)
-            conn.commit()
+
+            # Trigram full-text index over tag keywords keeps search_tags' substring
+            # semantics without scanning the whole tags table
+            try:
+                cursor.execute(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS tags_fts USING fts5(keyword, content=tags, content_rowid=id, tokenize='trigram')"
+                )
+                cursor.execute(
+                    """
+                    CREATE TRIGGER IF NOT EXISTS tags_fts_ai AFTER INSERT ON tags BEGIN
+                        INSERT INTO tags_fts(rowid, keyword) VALUES (new.id, new.keyword);
+                    END
+                    """
+                )
+                cursor.execute(
+                    """
+                    CREATE TRIGGER IF NOT EXISTS tags_fts_ad AFTER DELETE ON tags BEGIN
+                        INSERT INTO tags_fts(tags_fts, rowid, keyword) VALUES ('delete', old.id, old.keyword);
+                    END
+                    """
+                )
+                cursor.execute(
+                    """
+                    CREATE TRIGGER IF NOT EXISTS tags_fts_au AFTER UPDATE OF keyword ON tags BEGIN
+                        INSERT INTO tags_fts(tags_fts, rowid, keyword) VALUES ('delete', old.id, old.keyword);
+                        INSERT INTO tags_fts(rowid, keyword) VALUES (new.id, new.keyword);
+                    END
+                    """
+                )
+                cursor.execute("INSERT INTO tags_fts(tags_fts) VALUES ('rebuild')")
+            except sqlite3.OperationalError as _fts_err:
+                logger.warning(f"Tag search index unavailable, falling back to LIKE: {_fts_err}")
 
             # --- Lightweight crawler caches ---
             try:
@@ -542,27 +1011,54 @@ class DatabaseManager:
                     )
                     """
                 )
-                conn.commit()
             except Exception as _crawl_err:
                 logger.warning(f"Crawler cache tables init failed: {_crawl_err}")
 
+            # Local media URLs are stored as relative paths and expanded with settings.MEDIA_BASE_URL on read
+            try:
+                for origin in ('http://127.0.0.1:8000', 'http://127.0.0.1:8001', 'http://localhost:8000', 'http://localhost:8001'):
+                    for prefix in _MEDIA_PREFIXES:
+                        absolute = f'"{origin}{prefix}'
+                        cursor.execute(
+                            "UPDATE saved_recipes SET recipe_content = replace(recipe_content, ?, ?) WHERE instr(recipe_content, ?) > 0",
+                            (absolute, f'"{prefix}', absolute)
+                        )
+                        cursor.execute(
+                            "UPDATE collections SET image_url = substr(image_url, ?) WHERE image_url LIKE ?",
+                            (len(origin) + 1, f"{origin}{prefix}%")
+                        )
+            except Exception as _media_err:
+                logger.warning(f"Relativizing stored media URLs failed: {_media_err}")
+
+            # Refresh planner statistics for the indexes created above (sqlite_stat1)
+            cursor.execute("ANALYZE")
+            self._store_migration_state(cursor)
+
     def create_user(self, user_data: UserCreate) -> Optional[User]:
         try:
-            with self.get_connection() as conn:
+            with self._acquire_write() as conn:
                 cursor = conn.cursor()
                 if self.get_user_by_email(user_data.email):
                     return None
                 
                 hashed_password = get_password_hash(user_data.password)
+                username = getattr(user_data, 'username', None)
                 cursor.execute(
-                    "INSERT INTO users (email, full_name, username, hashed_password) VALUES (?, ?, ?, ?)",
-                    (user_data.email, user_data.full_name, getattr(user_data, 'username', None), hashed_password)
+                    "INSERT INTO users (email, full_name, username, hashed_password) VALUES (?, ?, ?, ?) "
+                    "RETURNING id, is_active, created_at",
+                    (user_data.email, user_data.full_name, username, hashed_password)
+                )
+                user_id, is_active, created_at = cursor.fetchone()
+                cursor.execute("INSERT OR IGNORE INTO user_roles (user_id, role) VALUES (?, ?)", (user_id, 'user'))
+                return User(
+                    id=user_id,
+                    email=user_data.email,
+                    full_name=user_data.full_name,
+                    username=username,
+                    is_active=bool(is_active),
+                    created_at=created_at,
+                    roles=['user'],
                 )
-                user_id = cursor.lastrowid
-                if user_id:
-                    cursor.execute("INSERT OR IGNORE INTO user_roles (user_id, role) VALUES (?, ?)", (user_id, 'user'))
-                conn.commit()
-                return self.get_user_by_id(user_id) if user_id else None
         except Exception as e:
             logger.error(f"Error creating user: {e}")
             return None
@@ -578,21 +1074,18 @@ class DatabaseManager:
         if needs_rehash(user.hashed_password):
             self.update_password(user.id, get_password_hash(password))
 
-        return self.get_user_by_id(user.id)
+        # The row we just verified against is the whole user; no second lookup by id.
+        return User(**user.model_dump(exclude={"hashed_password"}))
 
     def get_user_by_email(self, email: str) -> Optional[UserInDB]:
         try:
-            with self.get_connection() as conn:
+            with self._acquire_read() as conn:
                 cursor = conn.cursor()
-                cursor.execute("SELECT * FROM users WHERE email = ?", (email,))
+                cursor.execute(SQL_USER_WITH_ROLES + "WHERE u.email = ? GROUP BY u.id", (email,))
                 row = cursor.fetchone()
                 if not row:
                     return None
-                user_dict = dict(row)
-                cursor.execute("SELECT role FROM user_roles WHERE user_id = ?", (user_dict['id'],))
-                roles = [r[0] for r in cursor.fetchall()]
-                user_dict['roles'] = roles
-                return UserInDB(**user_dict)
+                return UserInDB(**_user_fields(row))
         except Exception as e:
             logger.error(f"Error getting user by email '{email}': {e}")
             return None
@@ -600,7 +1093,7 @@ class DatabaseManager:
     # --- Crawler cache helpers ---
     def get_domain_fingerprint(self, domain: str) -> Optional[dict]:
         try:
-            with self.get_connection() as conn:
+            with self._acquire_read() as conn:
                 c = conn.cursor()
                 c.execute("SELECT selectors_json, schema_json FROM domain_fingerprints WHERE domain=?", (domain,))
                 row = c.fetchone()
@@ -625,7 +1118,7 @@ class DatabaseManager:
     def upsert_domain_fingerprint(self, domain: str, selectors: Optional[list] = None, schema: Optional[dict] = None):
         try:
             import json as _json
-            with self.get_connection() as conn:
+            with self._acquire_write() as conn:
                 c = conn.cursor()
                 c.execute(
                     """
@@ -638,13 +1131,12 @@ class DatabaseManager:
                     """,
                     (domain, _json.dumps(selectors) if selectors else None, _json.dumps(schema) if schema else None)
                 )
-                conn.commit()
         except Exception as e:
             logger.warning(f"upsert_domain_fingerprint failed for {domain}: {e}")
 
     def get_ingredient_parse_cache(self, key: str) -> Optional[str]:
         try:
-            with self.get_connection() as conn:
+            with self._acquire_read() as conn:
                 c = conn.cursor()
                 c.execute("SELECT parsed_json FROM ingredient_parse_cache WHERE key=?", (key,))
                 row = c.fetchone()
@@ -654,7 +1146,7 @@ class DatabaseManager:
 
     def upsert_ingredient_parse_cache(self, key: str, original: str, parsed_json: str):
         try:
-            with self.get_connection() as conn:
+            with self._acquire_write() as conn:
                 c = conn.cursor()
                 c.execute(
                     """
@@ -664,13 +1156,12 @@ class DatabaseManager:
                     """,
                     (key, original, parsed_json)
                 )
-                conn.commit()
         except Exception as e:
             logger.warning(f"upsert_ingredient_parse_cache failed: {e}")
 
     # --- Ingredient utilities ---
     def get_all_canonical(self) -> list[dict]:
-        with self.get_connection() as conn:
+        with self._acquire_read() as conn:
             c = conn.cursor()
             c.execute("SELECT id, name_en FROM canonical_ingredients")
             rows = c.fetchall()
@@ -678,14 +1169,13 @@ class DatabaseManager:
 
     def get_or_create_canonical(self, name_en: str) -> Optional[int]:
         try:
-            with self.get_connection() as conn:
+            with self._acquire_write() as conn:
                 c = conn.cursor()
                 c.execute("SELECT id FROM canonical_ingredients WHERE LOWER(name_en)=LOWER(?)", (name_en,))
                 row = c.fetchone()
                 if row:
                     return int(row[0])
                 c.execute("INSERT INTO canonical_ingredients (name_en) VALUES (?)", (name_en,))
-                conn.commit()
                 return int(c.lastrowid)
         except Exception as e:
             logger.error(f"get_or_create_canonical failed for '{name_en}': {e}")
@@ -693,30 +1183,28 @@ class DatabaseManager:
 
     def upsert_alias(self, alias_text: str, lang: str, canonical_id: int, confidence: float, source: str = "auto"):
         try:
-            with self.get_connection() as conn:
+            with self._acquire_write() as conn:
                 c = conn.cursor()
                 c.execute(
                     "INSERT OR IGNORE INTO ingredient_aliases (alias_text, lang, canonical_ingredient_id, confidence, notes) VALUES (?, ?, ?, ?, ?)",
                     (alias_text.strip().lower(), lang.strip().lower(), canonical_id, confidence, source),
                 )
-                conn.commit()
         except Exception as e:
             logger.warning(f"upsert_alias failed: {e}")
 
     def upsert_translation(self, canonical_id: int, lang: str, translated_name: str, source: Optional[str] = None, confidence: Optional[float] = None):
         try:
-            with self.get_connection() as conn:
+            with self._acquire_write() as conn:
                 c = conn.cursor()
                 c.execute(
                     "INSERT OR REPLACE INTO ingredient_translations (canonical_ingredient_id, lang, translated_name, source, confidence) VALUES (?, ?, ?, ?, ?)",
                     (canonical_id, lang.strip().lower(), translated_name.strip(), source, confidence),
                 )
-                conn.commit()
         except Exception as e:
             logger.warning(f"upsert_translation failed: {e}")
 
     def get_translations_for_lang(self, lang: str) -> dict[int, str]:
-        with self.get_connection() as conn:
+        with self._acquire_read() as conn:
             c = conn.cursor()
             c.execute(
                 "SELECT canonical_ingredient_id, translated_name FROM ingredient_translations WHERE lang = ?",
@@ -726,7 +1214,7 @@ class DatabaseManager:
 
     def get_translation_for(self, canonical_id: int, lang: str) -> Optional[str]:
         try:
-            with self.get_connection() as conn:
+            with self._acquire_read() as conn:
                 c = conn.cursor()
                 c.execute("SELECT translated_name FROM ingredient_translations WHERE canonical_ingredient_id=? AND lang=? LIMIT 1", (canonical_id, lang.strip().lower()))
                 row = c.fetchone()
@@ -736,7 +1224,7 @@ class DatabaseManager:
 
     def get_alias_for_canonical(self, canonical_id: int, lang: str) -> Optional[tuple[str, float]]:
         try:
-            with self.get_connection() as conn:
+            with self._acquire_read() as conn:
                 c = conn.cursor()
                 c.execute(
                     "SELECT ia.alias_text, ia.confidence FROM ingredient_aliases ia WHERE ia.canonical_ingredient_id=? AND ia.lang=? ORDER BY ia.confidence DESC LIMIT 1",
@@ -751,7 +1239,7 @@ class DatabaseManager:
 
     def get_canonical_name(self, canonical_id: int) -> Optional[str]:
         try:
-            with self.get_connection() as conn:
+            with self._acquire_read() as conn:
                 c = conn.cursor()
                 c.execute("SELECT name_en FROM canonical_ingredients WHERE id=?", (canonical_id,))
                 row = c.fetchone()
@@ -761,29 +1249,24 @@ class DatabaseManager:
 
     def insert_recipe_ingredient(self, recipe_id: int, original_text: str, canonical_id: Optional[int], confidence: Optional[float], source: Optional[str]):
         try:
-            with self.get_connection() as conn:
+            with self._acquire_write() as conn:
                 c = conn.cursor()
                 c.execute(
                     "INSERT INTO recipe_ingredients (recipe_id, original_text, canonical_ingredient_id, confidence, source) VALUES (?, ?, ?, ?, ?)",
                     (recipe_id, original_text, canonical_id, confidence, source),
                 )
-                conn.commit()
         except Exception as e:
             logger.warning(f"insert_recipe_ingredient failed: {e}")
 
     def get_user_by_id(self, user_id: int) -> Optional[User]:
         try:
-            with self.get_connection() as conn:
+            with self._acquire_read() as conn:
                 cursor = conn.cursor()
-                cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,))
+                cursor.execute(SQL_USER_WITH_ROLES + "WHERE u.id = ? GROUP BY u.id", (user_id,))
                 row = cursor.fetchone()
                 if not row:
                     return None
-                user_dict = dict(row)
-                cursor.execute("SELECT role FROM user_roles WHERE user_id = ?", (user_id,))
-                roles = [r[0] for r in cursor.fetchall()]
-                user_dict['roles'] = roles
-                return User(**user_dict)
+                return User(**_user_fields(row))
         except Exception as e:
             logger.error(f"Error getting user by ID {user_id}: {e}")
             return None
@@ -792,7 +1275,7 @@ class DatabaseManager:
         try:
             if not username:
                 return None
-            with self.get_connection() as conn:
+            with self._acquire_read() as conn:
                 cursor = conn.cursor()
                 cursor.execute("SELECT * FROM users WHERE LOWER(username) = LOWER(?)", (username,))
                 row = cursor.fetchone()
@@ -819,37 +1302,45 @@ class DatabaseManager:
     
     def update_password(self, user_id: int, new_hashed_password: str):
         try:
-            with self.get_connection() as conn:
+            with self._acquire_write() as conn:
                 cursor = conn.cursor()
                 cursor.execute(
                     "UPDATE users SET hashed_password = ? WHERE id = ?",
                     (new_hashed_password, user_id)
                 )
-                conn.commit()
                 logger.info(f"Password for user {user_id} has been securely updated.")
         except Exception as e:
             logger.error(f"Error updating password for user {user_id}: {e}")
 
     def create_oauth_user(self, email: str, full_name: str, google_id: str, avatar_url: Optional[str] = None) -> Optional[User]:
         try:
-            with self.get_connection() as conn:
+            with self._acquire_write() as conn:
                 cursor = conn.cursor()
                 # Some older DBs may have NOT NULL constraint on hashed_password. Insert empty string to satisfy it.
                 try:
                     cursor.execute(
-                        "INSERT INTO users (email, full_name, username, hashed_password, google_id, avatar_url, auth_provider) VALUES (?, ?, ?, ?, ?, ?, 'google')",
+                        "INSERT INTO users (email, full_name, username, hashed_password, google_id, avatar_url, auth_provider) VALUES (?, ?, ?, ?, ?, ?, 'google') "
+                        "RETURNING id, is_active, created_at",
                         (email, full_name, None, '', google_id, avatar_url)
                     )
                 except Exception:
                     # Fallback for schema without NOT NULL on hashed_password
                     cursor.execute(
-                        "INSERT INTO users (email, full_name, google_id, avatar_url, auth_provider) VALUES (?, ?, ?, ?, 'google')",
+                        "INSERT INTO users (email, full_name, google_id, avatar_url, auth_provider) VALUES (?, ?, ?, ?, 'google') "
+                        "RETURNING id, is_active, created_at",
                         (email, full_name, google_id, avatar_url)
                     )
-                user_id = cursor.lastrowid
+                user_id, is_active, created_at = cursor.fetchone()
                 cursor.execute("INSERT OR IGNORE INTO user_roles (user_id, role) VALUES (?, ?)", (user_id, 'user'))
-                conn.commit()
-                return self.get_user_by_id(user_id)
+                return User(
+                    id=user_id,
+                    email=email,
+                    full_name=full_name,
+                    avatar_url=avatar_url,
+                    is_active=bool(is_active),
+                    created_at=created_at,
+                    roles=['user'],
+                )
         except Exception as e:
             logger.error(f"Error creating OAuth user: {e}")
             return None
@@ -905,28 +1396,56 @@ class DatabaseManager:
                 recipe_content['instructions'] = _coerce_instructions(recipe_content['instructions'])
 
             # Validate with Pydantic model before serializing
-            validated_content = RecipeContent.model_validate(recipe_content)
+            validated_content = _relativize_media_urls(RecipeContent.model_validate(recipe_content))
             recipe_json = validated_content.model_dump_json()
 
-            with self.get_connection() as conn:
+            with self._acquire_write() as conn:
                 cursor = conn.cursor()
                 cursor.execute(
-                    "INSERT INTO saved_recipes (user_id, source_url, recipe_content) VALUES (?, ?, ?)",
+                    """
+                    INSERT INTO saved_recipes (user_id, source_url, recipe_content) VALUES (?, ?, ?)
+                    RETURNING id, created_at AS "created_at [timestamp]",
+                        (SELECT username FROM users WHERE id = user_id),
+                        (SELECT full_name FROM users WHERE id = user_id),
+                        (SELECT avatar_url FROM users WHERE id = user_id)
+                    """,
                     (user_id, source_url, recipe_json)
                 )
-                recipe_id = cursor.lastrowid
-                conn.commit()
-                return self.get_saved_recipe(recipe_id) if recipe_id else None
+                recipe_id, created_at, owner_username, owner_full_name, owner_avatar = cursor.fetchone()
+            # A freshly inserted recipe has no tags or ratings yet
+            return SavedRecipe(
+                id=recipe_id,
+                user_id=user_id,
+                source_url=source_url,
+                created_at=created_at,
+                recipe_content=_expand_media_urls(validated_content),
+                tags={"approved": [], "pending": []},
+                owner_username=owner_username or None,
+                owner_full_name=owner_full_name or None,
+                owner_avatar=owner_avatar or None
+            )
         except Exception as e:
             logger.error(f"Error saving recipe for user {user_id}: {e}")
             return None
 
+    def update_recipe_content(self, recipe_id: int, user_id: int, recipe_content: RecipeContent) -> bool:
+        """Overwrite a recipe's content, storing local media as server-relative paths."""
+        recipe_json = _relativize_media_urls(recipe_content).model_dump_json()
+        with self._acquire_write() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "UPDATE saved_recipes SET recipe_content = ? WHERE id = ? AND user_id = ?",
+                (recipe_json, recipe_id, user_id)
+            )
+            return cursor.rowcount > 0
+
     def get_saved_recipe(self, recipe_id: int) -> Optional[SavedRecipe]:
         try:
-            with self.get_connection() as conn:
+            with self._acquire_read() as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
-                    SELECT sr.*, u.username as owner_username, u.full_name as owner_full_name, u.avatar_url as owner_avatar
+                    SELECT sr.id, sr.user_id, sr.source_url, sr.recipe_content, sr.created_at AS "created_at [timestamp]",
+                           u.username as owner_username, u.full_name as owner_full_name, u.avatar_url as owner_avatar
                     FROM saved_recipes sr
                     LEFT JOIN users u ON u.id = sr.user_id
                     WHERE sr.id = ?
@@ -945,8 +1464,8 @@ class DatabaseManager:
                         id=row['id'],
                         user_id=row['user_id'],
                         source_url=row['source_url'],
-                        created_at=datetime.fromisoformat(row["created_at"]),
-                        recipe_content=RecipeContent.model_validate_json(row['recipe_content']),
+                        created_at=row["created_at"],
+                        recipe_content=_expand_media_urls(RecipeContent.model_validate_json(row['recipe_content'])),
                         tags=tags,
                         owner_username=row['owner_username'] if row['owner_username'] else None,
                         owner_full_name=row['owner_full_name'] if row['owner_full_name'] else None,
@@ -957,130 +1476,73 @@ class DatabaseManager:
             logger.error(f"Error getting saved recipe {recipe_id}: {e}")
             return None
 
-    def get_user_saved_recipes(self, user_id: int, sort: str = "latest") -> List[SavedRecipe]:
-        try:
-            with self.get_connection() as conn:
-                cursor = conn.cursor()
-                if sort == 'rating_desc':
-                    order = "ORDER BY rating_average DESC, rating_count DESC, created_at DESC"
-                elif sort == 'rating_count_desc':
-                    order = "ORDER BY rating_count DESC, rating_average DESC, created_at DESC"
-                else:
-                    order = "ORDER BY created_at DESC"
-                cursor.execute(f"""
-                    SELECT sr.*, u.username as owner_username, u.full_name as owner_full_name, u.avatar_url as owner_avatar
-                    FROM saved_recipes sr
-                    LEFT JOIN users u ON u.id = sr.user_id
-                    WHERE sr.user_id = ? {order}
-                """, (user_id,))
-                rows = cursor.fetchall()
-                recipes = []
-                for row in rows:
-                    content_dict = json.loads(row['recipe_content'])
-
-                    # Definitive image URL normalization
-                    def _normalize_port(url: str) -> str:
-                        try:
-                            if isinstance(url, str):
-                                if url.startswith('http://127.0.0.1:8000'):
-                                    return url.replace('http://127.0.0.1:8000', 'http://127.0.0.1:8001')
-                                if url.startswith('http://localhost:8000'):
-                                    return url.replace('http://localhost:8000', 'http://localhost:8001')
-                        except Exception:
-                            pass
-                        return url
-
-                    image = content_dict.get('image_url') or content_dict.get('img') or content_dict.get('thumbnail_path')
-                    image = _normalize_port(image) if image else image
-                    if image:
-                        content_dict['image_url'] = image
-                        content_dict['thumbnail_path'] = image
+    def iter_user_saved_recipes(self, user_id: int, sort: str = "latest") -> Iterator[SavedRecipe]:
+        """Yield a user's saved recipes one at a time, fetching rows in batches.
 
-                    # Normalize instruction step images if present
-                    if isinstance(content_dict.get('instructions'), list):
-                        for inst in content_dict['instructions']:
-                            if isinstance(inst, dict) and inst.get('image_path'):
-                                inst['image_path'] = _normalize_port(inst['image_path'])
+        The pooled read connection stays checked out until the generator is
+        exhausted or closed, so consume it promptly.
+        """
+        with self._acquire_read() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            cursor.execute(_USER_RECIPES_SQL_BY_SORT.get(sort, SQL_USER_RECIPES_LATEST), (user_id,))
+            while True:
+                rows = cursor.fetchmany(128)
+                if not rows:
+                    break
+                for recipe_id, owner_id, source_url, raw_content, created_at, owner_username, owner_full_name, owner_avatar in rows:
+                    content = _parse_recipe_content(raw_content)
 
                     # Attach tags so frontend cards can show chips immediately
                     try:
-                        tags = self.list_recipe_tags(row['id'])
+                        tags = self.list_recipe_tags(recipe_id)
                     except Exception:
                         tags = {"approved": [], "pending": []}
 
-                    recipes.append(
-                        SavedRecipe(
-                            id=row['id'],
-                            user_id=row['user_id'],
-                            source_url=row['source_url'],
-                            created_at=datetime.fromisoformat(row["created_at"]),
-                            recipe_content=RecipeContent.model_validate(content_dict),
-                            tags=tags,
-                            owner_username=row['owner_username'] if row['owner_username'] else None,
-                            owner_full_name=row['owner_full_name'] if row['owner_full_name'] else None,
-                            owner_avatar=row['owner_avatar'] if row['owner_avatar'] else None
-                        )
+                    yield SavedRecipe(
+                        id=recipe_id,
+                        user_id=owner_id,
+                        source_url=source_url,
+                        created_at=created_at,
+                        recipe_content=content,
+                        tags=tags,
+                        owner_username=owner_username or None,
+                        owner_full_name=owner_full_name or None,
+                        owner_avatar=owner_avatar or None
                     )
 
-                return recipes
+    def get_user_saved_recipes(self, user_id: int, sort: str = "latest") -> List[SavedRecipe]:
+        try:
+            return list(self.iter_user_saved_recipes(user_id, sort))
         except Exception as e:
             logger.error(f"Error getting saved recipes for user {user_id}: {e}")
             return []
 
     def get_all_saved_recipes(self, sort: str = "latest") -> List[SavedRecipe]:
         try:
-            with self.get_connection() as conn:
+            with self._acquire_read() as conn:
                 cursor = conn.cursor()
-                if sort == 'rating_desc':
-                    order = "ORDER BY rating_average DESC, rating_count DESC, created_at DESC"
-                elif sort == 'rating_count_desc':
-                    order = "ORDER BY rating_count DESC, rating_average DESC, created_at DESC"
-                else:
-                    order = "ORDER BY created_at DESC"
-                cursor.execute(f"""
-                    SELECT sr.*, u.username as owner_username, u.full_name as owner_full_name, u.avatar_url as owner_avatar
-                    FROM saved_recipes sr
-                    LEFT JOIN users u ON u.id = sr.user_id
-                    {order}
-                """)
+                cursor.row_factory = None
+                cursor.execute(_ALL_RECIPES_SQL_BY_SORT.get(sort, SQL_ALL_RECIPES_LATEST))
                 rows = cursor.fetchall()
                 recipes: List[SavedRecipe] = []
-                for row in rows:
-                    content_dict = json.loads(row['recipe_content'])
-                    def _normalize_port(url: str) -> str:
-                        try:
-                            if isinstance(url, str):
-                                if url.startswith('http://127.0.0.1:8000'):
-                                    return url.replace('http://127.0.0.1:8000', 'http://127.0.0.1:8001')
-                                if url.startswith('http://localhost:8000'):
-                                    return url.replace('http://localhost:8000', 'http://localhost:8001')
-                        except Exception:
-                            pass
-                        return url
-                    image = content_dict.get('image_url') or content_dict.get('img') or content_dict.get('thumbnail_path')
-                    image = _normalize_port(image) if image else image
-                    if image:
-                        content_dict['image_url'] = image
-                        content_dict['thumbnail_path'] = image
-                    if isinstance(content_dict.get('instructions'), list):
-                        for inst in content_dict['instructions']:
-                            if isinstance(inst, dict) and inst.get('image_path'):
-                                inst['image_path'] = _normalize_port(inst['image_path'])
+                for recipe_id, owner_id, source_url, raw_content, created_at, owner_username, owner_full_name, owner_avatar in rows:
+                    content = _parse_recipe_content(raw_content)
                     try:
-                        tags = self.list_recipe_tags(row['id'])
+                        tags = self.list_recipe_tags(recipe_id)
                     except Exception:
                         tags = {"approved": [], "pending": []}
                     recipes.append(
                         SavedRecipe(
-                            id=row['id'],
-                            user_id=row['user_id'],
-                            source_url=row['source_url'],
-                            created_at=datetime.fromisoformat(row["created_at"]),
-                            recipe_content=RecipeContent.model_validate(content_dict),
+                            id=recipe_id,
+                            user_id=owner_id,
+                            source_url=source_url,
+                            created_at=created_at,
+                            recipe_content=content,
                             tags=tags,
-                            owner_username=row['owner_username'] if 'owner_username' in row else None,
-                            owner_full_name=row['owner_full_name'] if 'owner_full_name' in row else None,
-                            owner_avatar=row['owner_avatar'] if 'owner_avatar' in row else None
+                            owner_username=owner_username or None,
+                            owner_full_name=owner_full_name or None,
+                            owner_avatar=owner_avatar or None
                         )
                     )
                 return recipes
@@ -1090,14 +1552,13 @@ class DatabaseManager:
 
     # Collections API
     def create_collection(self, owner_id: int, title: str, description: Optional[str], visibility: str, image_url: Optional[str]) -> Optional[int]:
-        with self.get_connection() as conn:
+        with self._acquire_write() as conn:
             c = conn.cursor()
             c.execute("INSERT INTO collections (owner_id, title, description, visibility, image_url) VALUES (?,?,?,?,?)", (owner_id, title, description, visibility, image_url))
-            conn.commit()
             return c.lastrowid
 
     def list_collections(self, viewer_id: Optional[int]) -> List[dict]:
-        with self.get_connection() as conn:
+        with self._acquire_read() as conn:
             c = conn.cursor()
             c.execute(
                 """
@@ -1132,23 +1593,13 @@ class DatabaseManager:
                         )
                         rr = c.fetchone()
                         if rr:
-                            content = json.loads(rr[0]) if isinstance(rr[0], str) else (rr[0] or {})
+                            content = orjson.loads(rr[0]) if isinstance(rr[0], str) else (rr[0] or {})
                             image = content.get('image_url') or content.get('img') or content.get('thumbnail_path')
-                            def _normalize_port(url: str) -> str:
-                                try:
-                                    if isinstance(url, str):
-                                        if url.startswith('http://127.0.0.1:8000'):
-                                            return url.replace('http://127.0.0.1:8000', 'http://127.0.0.1:8001')
-                                        if url.startswith('http://localhost:8000'):
-                                            return url.replace('http://localhost:8000', 'http://localhost:8001')
-                                except Exception:
-                                    pass
-                                return url
-                            image = _normalize_port(image) if image else image
                             if image:
                                 d['image_url'] = image
                     except Exception:
                         pass
+                d['image_url'] = _to_media_url(d.get('image_url'))
                 d['liked_by_me'] = bool(d.get('liked_by_me'))
                 d['followed_by_me'] = bool(d.get('followed_by_me'))
                 from models.types import Collection
@@ -1156,7 +1607,7 @@ class DatabaseManager:
             return out
 
     def list_user_public_collections(self, owner_username: str, viewer_id: Optional[int]) -> List[dict]:
-        with self.get_connection() as conn:
+        with self._acquire_read() as conn:
             c = conn.cursor()
             c.execute(
                 """
@@ -1191,23 +1642,13 @@ class DatabaseManager:
                         )
                         rr = c.fetchone()
                         if rr:
-                            content = json.loads(rr[0]) if isinstance(rr[0], str) else (rr[0] or {})
+                            content = orjson.loads(rr[0]) if isinstance(rr[0], str) else (rr[0] or {})
                             image = content.get('image_url') or content.get('img') or content.get('thumbnail_path')
-                            def _normalize_port(url: str) -> str:
-                                try:
-                                    if isinstance(url, str):
-                                        if url.startswith('http://127.0.0.1:8000'):
-                                            return url.replace('http://127.0.0.1:8000', 'http://127.0.0.1:8001')
-                                        if url.startswith('http://localhost:8000'):
-                                            return url.replace('http://localhost:8000', 'http://localhost:8001')
-                                except Exception:
-                                    pass
-                                return url
-                            image = _normalize_port(image) if image else image
                             if image:
                                 d['image_url'] = image
                     except Exception:
                         pass
+                d['image_url'] = _to_media_url(d.get('image_url'))
                 d['liked_by_me'] = bool(d.get('liked_by_me'))
                 d['followed_by_me'] = bool(d.get('followed_by_me'))
                 from models.types import Collection
@@ -1215,7 +1656,7 @@ class DatabaseManager:
             return out
 
     def add_recipe_to_collection(self, collection_id: int, recipe_id: int):
-        with self.get_connection() as conn:
+        with self._acquire_write() as conn:
             c = conn.cursor()
             try:
                 c.execute("SELECT COALESCE(MAX(position), -1) + 1 FROM collection_recipes WHERE collection_id = ?", (collection_id,))
@@ -1234,36 +1675,24 @@ class DatabaseManager:
                     r = c.fetchone()
                     if r:
                         try:
-                            content = json.loads(r[0])
+                            content = orjson.loads(r[0])
                         except Exception:
                             content = {}
                         image = content.get('image_url') or content.get('img') or content.get('thumbnail_path')
-                        # Normalize port like elsewhere
-                        def _normalize_port(url: str) -> str:
-                            try:
-                                if isinstance(url, str):
-                                    if url.startswith('http://127.0.0.1:8000'):
-                                        return url.replace('http://127.0.0.1:8000', 'http://127.0.0.1:8001')
-                                    if url.startswith('http://localhost:8000'):
-                                        return url.replace('http://localhost:8000', 'http://localhost:8001')
-                            except Exception:
-                                pass
-                            return url
-                        image = _normalize_port(image) if image else image
                         if image:
-                            c.execute("UPDATE collections SET image_url = ? WHERE id = ?", (image, collection_id))
+                            c.execute("UPDATE collections SET image_url = ? WHERE id = ?", (_to_media_path(image), collection_id))
             except Exception:
                 pass
-            conn.commit()
             return {"ok": True}
 
     def list_collection_recipes(self, collection_id: int, user_id: Optional[int] = None) -> List[SavedRecipe]:
         try:
-            with self.get_connection() as conn:
+            with self._acquire_read() as conn:
                 c = conn.cursor()
+                c.row_factory = None
                 c.execute(
                     """
-                    SELECT sr.*, 
+                    SELECT sr.id, sr.user_id, sr.source_url, sr.recipe_content, sr.created_at AS "created_at [timestamp]",
                            u.username as owner_username,
                            u.full_name as owner_full_name,
                            COALESCE(r.avg_rating, 0.0) as rating_average,
@@ -1294,42 +1723,27 @@ class DatabaseManager:
                 )
                 rows = c.fetchall()
                 items: List[SavedRecipe] = []
-                for row in rows:
-                    content_dict = json.loads(row['recipe_content'])
-                    # Normalize image url
-                    def _normalize_port(url: str) -> str:
-                        try:
-                            if isinstance(url, str):
-                                if url.startswith('http://127.0.0.1:8000'):
-                                    return url.replace('http://127.0.0.1:8000', 'http://127.0.0.1:8001')
-                                if url.startswith('http://localhost:8000'):
-                                    return url.replace('http://localhost:8000', 'http://localhost:8001')
-                        except Exception:
-                            pass
-                        return url
-                    image = content_dict.get('image_url') or content_dict.get('img') or content_dict.get('thumbnail_path')
-                    image = _normalize_port(image) if image else image
-                    if image:
-                        content_dict['image_url'] = image
-                        content_dict['thumbnail_path'] = image
+                for (recipe_id, owner_id, source_url, raw_content, created_at, owner_username, owner_full_name,
+                     rating_average, rating_count, likes_count, liked_by_me) in rows:
+                    content = _parse_recipe_content(raw_content)
                     try:
-                        tags = self.list_recipe_tags(row['id'])
+                        tags = self.list_recipe_tags(recipe_id)
                     except Exception:
                         tags = {"approved": [], "pending": []}
                     items.append(
                         SavedRecipe(
-                            id=row['id'],
-                            user_id=row['user_id'],
-                            source_url=row['source_url'],
-                            created_at=datetime.fromisoformat(row['created_at']),
-                            recipe_content=RecipeContent.model_validate(content_dict),
+                            id=recipe_id,
+                            user_id=owner_id,
+                            source_url=source_url,
+                            created_at=created_at,
+                            recipe_content=content,
                             tags=tags,
-                            rating_average=row['rating_average'] if 'rating_average' in row else 0.0,
-                            rating_count=row['rating_count'] if 'rating_count' in row else 0,
-                            likes_count=row['likes_count'] if 'likes_count' in row else 0,
-                            liked_by_me=bool(row['liked_by_me']) if 'liked_by_me' in row else False,
-                            owner_username=row['owner_username'] if 'owner_username' in row else None,
-                            owner_full_name=row['owner_full_name'] if 'owner_full_name' in row else None
+                            rating_average=rating_average,
+                            rating_count=rating_count,
+                            likes_count=likes_count,
+                            liked_by_me=bool(liked_by_me),
+                            owner_username=owner_username or None,
+                            owner_full_name=owner_full_name or None
                         )
                     )
                 return items
@@ -1345,10 +1759,9 @@ class DatabaseManager:
         sets = ", ".join([f"{k} = ?" for k in updates.keys()])
         values = list(updates.values()) + [collection_id]
         try:
-            with self.get_connection() as conn:
+            with self._acquire_write() as conn:
                 c = conn.cursor()
                 c.execute(f"UPDATE collections SET {sets} WHERE id = ?", values)
-                conn.commit()
             return True
         except Exception as e:
             logger.error(f"Failed to update collection {collection_id}: {e}")
@@ -1356,7 +1769,7 @@ class DatabaseManager:
 
     def remove_recipe_from_collection(self, collection_id: int, recipe_id: int) -> bool:
         try:
-            with self.get_connection() as conn:
+            with self._acquire_write() as conn:
                 c = conn.cursor()
                 c.execute("DELETE FROM collection_recipes WHERE collection_id = ? AND recipe_id = ?", (collection_id, recipe_id))
                 # Compact positions
@@ -1367,7 +1780,6 @@ class DatabaseManager:
                         c.execute("UPDATE collection_recipes SET position = ? WHERE collection_id = ? AND recipe_id = ?", (idx, collection_id, rid))
                 except Exception:
                     pass
-                conn.commit()
             return True
         except Exception as e:
             logger.error(f"Failed to remove recipe {recipe_id} from collection {collection_id}: {e}")
@@ -1375,7 +1787,7 @@ class DatabaseManager:
 
     def reorder_collection_recipes(self, collection_id: int, recipe_ids: List[int]) -> bool:
         try:
-            with self.get_connection() as conn:
+            with self._acquire_write() as conn:
                 c = conn.cursor()
                 for idx, rid in enumerate(recipe_ids or []):
                     c.execute("UPDATE collection_recipes SET position = ? WHERE collection_id = ? AND recipe_id = ?", (idx, collection_id, rid))
@@ -1386,24 +1798,12 @@ class DatabaseManager:
                         c.execute("SELECT recipe_content FROM saved_recipes WHERE id = ?", (top_id,))
                         r = c.fetchone()
                         if r:
-                            content = json.loads(r[0]) if isinstance(r[0], str) else (r[0] or {})
+                            content = orjson.loads(r[0]) if isinstance(r[0], str) else (r[0] or {})
                             image = content.get('image_url') or content.get('img') or content.get('thumbnail_path')
-                            def _normalize_port(url: str) -> str:
-                                try:
-                                    if isinstance(url, str):
-                                        if url.startswith('http://127.0.0.1:8000'):
-                                            return url.replace('http://127.0.0.1:8000', 'http://127.0.0.1:8001')
-                                        if url.startswith('http://localhost:8000'):
-                                            return url.replace('http://localhost:8000', 'http://localhost:8001')
-                                except Exception:
-                                    pass
-                                return url
-                            image = _normalize_port(image) if image else image
                             if image:
-                                c.execute("UPDATE collections SET image_url = ? WHERE id = ?", (image, collection_id))
+                                c.execute("UPDATE collections SET image_url = ? WHERE id = ?", (_to_media_path(image), collection_id))
                     except Exception:
                         pass
-                conn.commit()
             return True
         except Exception as e:
             logger.error(f"Failed to reorder recipes for collection {collection_id}: {e}")
@@ -1413,15 +1813,8 @@ class DatabaseManager:
     def _normalize_keyword(self, raw: str) -> Optional[str]:
         if not raw or not isinstance(raw, str):
             return None
-        s = raw.strip().lower()
-        try:
-            s = s.encode('ascii', 'ignore').decode('ascii')
-        except Exception:
-            pass
-        # keep only letters/numbers
-        import re
-        s = re.sub(r'[^a-z0-9]+', '', s)
-        return s or None
+        # keep only lowercased ASCII letters/numbers, in one pass
+        return raw.translate(_KEYWORD_XLAT) or None
 
     def _seed_canonical_tags(self, cursor):
         canonical = {
@@ -1447,60 +1840,70 @@ class DatabaseManager:
                 'chicken','eggs','cheese','fruits','wine'
             ]
         }
-        for ttype, words in canonical.items():
-            for kw in words:
-                try:
-                    cursor.execute("INSERT OR IGNORE INTO tags (keyword, type, active) VALUES (?, ?, 1)", (kw, ttype))
-                except Exception:
-                    pass
+        rows = [(kw, ttype) for ttype, words in canonical.items() for kw in words]
+        cursor.executemany("INSERT OR IGNORE INTO tags (keyword, type, active) VALUES (?, ?, 1)", rows)
 
     def search_tags(self, query: Optional[str] = None) -> List[dict]:
-        with self.get_connection() as conn:
+        with self._acquire_read() as conn:
             cursor = conn.cursor()
             if query:
-                q = f"%{self._normalize_keyword(query) or ''}%"
-                cursor.execute("SELECT id, keyword, type FROM tags WHERE active=1 AND keyword LIKE ? ORDER BY type, keyword", (q,))
+                q = self._normalize_keyword(query) or ''
+                rows = None
+                # The trigram index needs at least three characters to match on
+                if len(q) >= 3:
+                    try:
+                        # Normalized keywords are [a-z0-9] only, so quoting is safe
+                        cursor.execute(SQL_SEARCH_TAGS_FTS, (f'"{q}"',))
+                        rows = cursor.fetchall()
+                    except sqlite3.OperationalError:
+                        rows = None
+                if rows is None:
+                    cursor.execute(SQL_SEARCH_TAGS, (f"%{q}%",))
+                    rows = cursor.fetchall()
+                return [dict(id=r[0], keyword=r[1], type=r[2]) for r in rows]
             else:
-                cursor.execute("SELECT id, keyword, type FROM tags WHERE active=1 ORDER BY type, keyword")
+                cursor.execute(SQL_LIST_TAGS)
             rows = cursor.fetchall()
             return [dict(id=r[0], keyword=r[1], type=r[2]) for r in rows]
 
+    def _reload_tag_cache(self):
+        with self._acquire_read() as conn:
+            c = conn.cursor()
+            c.execute("SELECT alias, tag_id FROM tag_synonyms")
+            mapping = {r[0]: r[1] for r in c.fetchall()}
+            # Canonical keywords win over synonyms with the same spelling
+            c.execute("SELECT keyword, id FROM tags WHERE active=1")
+            mapping.update((r[0], r[1]) for r in c.fetchall())
+        with self._tag_cache_lock:
+            self._tag_id_by_key = mapping
+
     def _map_to_canonical_tag_id(self, keyword: str) -> Optional[int]:
         key = self._normalize_keyword(keyword)
         if not key:
             return None
-        with self.get_connection() as conn:
-            c = conn.cursor()
-            c.execute("SELECT id FROM tags WHERE keyword = ? AND active=1", (key,))
-            row = c.fetchone()
-            if row:
-                return row[0]
-            c.execute("SELECT tag_id FROM tag_synonyms WHERE alias = ?", (key,))
-            row = c.fetchone()
-            return row[0] if row else None
+        return self._tag_id_by_key.get(key)
 
     def get_recipe_owner_id(self, recipe_id: int) -> Optional[int]:
-        with self.get_connection() as conn:
+        with self._acquire_read() as conn:
             c = conn.cursor()
             c.execute("SELECT user_id FROM saved_recipes WHERE id = ?", (recipe_id,))
             r = c.fetchone()
             return r[0] if r else None
 
     def is_tag_edit_locked(self, recipe_id: int) -> bool:
-        with self.get_connection() as conn:
+        with self._acquire_read() as conn:
             c = conn.cursor()
             c.execute("SELECT locked FROM recipe_tag_locks WHERE recipe_id = ?", (recipe_id,))
             r = c.fetchone()
             return bool(r[0]) if r else False
 
     def set_tag_lock(self, recipe_id: int, locked: bool, by_user_id: Optional[int], reason: Optional[str]):
-        with self.get_connection() as conn:
+        with self._acquire_write() as conn:
             c = conn.cursor()
             c.execute("INSERT INTO recipe_tag_locks (recipe_id, locked, locked_by, reason) VALUES (?, ?, ?, ?) ON CONFLICT(recipe_id) DO UPDATE SET locked=excluded.locked, locked_by=excluded.locked_by, reason=excluded.reason, created_at=CURRENT_TIMESTAMP", (recipe_id, int(locked), by_user_id, reason))
-            conn.commit()
 
     def list_recipe_tags(self, recipe_id: int) -> dict:
-        with self.get_connection() as conn:
+        with self._acquire_read() as conn:
             c = conn.cursor()
             c.execute("SELECT rt.id, rt.status, t.id, t.keyword, t.type FROM recipe_tags rt JOIN tags t ON t.id=rt.tag_id WHERE rt.recipe_id = ?", (recipe_id,))
             rows = c.fetchall()
@@ -1514,64 +1917,61 @@ class DatabaseManager:
     def add_recipe_tags(self, recipe_id: int, user_id: int, keywords: List[str], direct: bool) -> dict:
         if not keywords:
             return {"added": [], "pending": [], "invalid": []}
-        owner_id = self.get_recipe_owner_id(recipe_id)
         status = 'approved' if direct else 'pending'
-        added, pend, invalid = [], [], []
-        with self.get_connection() as conn:
-            c = conn.cursor()
-            for kw in keywords:
-                tag_id = self._map_to_canonical_tag_id(kw)
-                if not tag_id:
-                    invalid.append(kw)
-                    continue
-                try:
-                    c.execute("INSERT OR IGNORE INTO recipe_tags (recipe_id, tag_id, status, suggested_by, approved_by) VALUES (?, ?, ?, ?, NULL)", (recipe_id, tag_id, status, user_id))
-                    c.execute("INSERT INTO tag_change_log (recipe_id, user_id, action, tag_id, details) VALUES (?, ?, ?, ?, ?)", (recipe_id, user_id, 'add' if direct else 'suggest', tag_id, None))
-                    if status == 'approved':
-                        added.append(kw)
-                    else:
-                        pend.append(kw)
-                except Exception:
-                    pass
-            conn.commit()
-        return {"added": added, "pending": pend, "invalid": invalid}
+        action = 'add' if direct else 'suggest'
+        accepted, invalid = [], []
+        recipe_tag_rows, log_rows = [], []
+        for kw in keywords:
+            tag_id = self._map_to_canonical_tag_id(kw)
+            if not tag_id:
+                invalid.append(kw)
+                continue
+            accepted.append(kw)
+            recipe_tag_rows.append((recipe_id, tag_id, status, user_id))
+            log_rows.append((recipe_id, user_id, action, tag_id))
+        if recipe_tag_rows:
+            with self._acquire_write() as conn:
+                c = conn.cursor()
+                c.executemany("INSERT OR IGNORE INTO recipe_tags (recipe_id, tag_id, status, suggested_by, approved_by) VALUES (?, ?, ?, ?, NULL)", recipe_tag_rows)
+                c.executemany("INSERT INTO tag_change_log (recipe_id, user_id, action, tag_id, details) VALUES (?, ?, ?, ?, NULL)", log_rows)
+        if direct:
+            return {"added": accepted, "pending": [], "invalid": invalid}
+        return {"added": [], "pending": accepted, "invalid": invalid}
 
     def remove_recipe_tag(self, recipe_id: int, user_id: int, keyword: str):
         tag_id = self._map_to_canonical_tag_id(keyword)
         if not tag_id:
             return {"removed": False, "reason": "invalid"}
-        with self.get_connection() as conn:
+        with self._acquire_write() as conn:
             c = conn.cursor()
             c.execute("DELETE FROM recipe_tags WHERE recipe_id = ? AND tag_id = ?", (recipe_id, tag_id))
             c.execute("INSERT INTO tag_change_log (recipe_id, user_id, action, tag_id, details) VALUES (?, ?, 'remove', ?, NULL)", (recipe_id, user_id, tag_id))
-            conn.commit()
             return {"removed": True}
 
     def approve_recipe_tag(self, recipe_id: int, user_id: int, keyword: str):
         tag_id = self._map_to_canonical_tag_id(keyword)
         if not tag_id:
             return {"ok": False, "reason": "invalid"}
-        with self.get_connection() as conn:
+        with self._acquire_write() as conn:
             c = conn.cursor()
             c.execute("UPDATE recipe_tags SET status='approved', approved_by=? WHERE recipe_id=? AND tag_id=?", (user_id, recipe_id, tag_id))
             c.execute("INSERT INTO tag_change_log (recipe_id, user_id, action, tag_id, details) VALUES (?, ?, 'approve', ?, NULL)", (recipe_id, user_id, tag_id))
-            conn.commit()
             return {"ok": True}
 
     def reject_recipe_tag(self, recipe_id: int, user_id: int, keyword: str):
         tag_id = self._map_to_canonical_tag_id(keyword)
         if not tag_id:
             return {"ok": False, "reason": "invalid"}
-        with self.get_connection() as conn:
+        with self._acquire_write() as conn:
             c = conn.cursor()
             c.execute("UPDATE recipe_tags SET status='rejected', approved_by=NULL WHERE recipe_id=? AND tag_id=?", (recipe_id, tag_id))
             c.execute("INSERT INTO tag_change_log (recipe_id, user_id, action, tag_id, details) VALUES (?, ?, 'reject', ?, NULL)", (recipe_id, user_id, tag_id))
-            conn.commit()
             return {"ok": True}
 
     def list_tag_history(self, recipe_id: int) -> List[dict]:
-        with self.get_connection() as conn:
+        with self._acquire_read() as conn:
             c = conn.cursor()
+            c.row_factory = None
             c.execute(
                 """
                 SELECT l.id, l.user_id, u.full_name, l.action, l.tag_id, t.keyword, l.details, l.created_at
@@ -1583,204 +1983,149 @@ class DatabaseManager:
                 """,
                 (recipe_id,)
             )
-            rows = c.fetchall()
-            return [
-                {
-                    "id": r[0],
-                    "userId": r[1],
-                    "userName": r[2],
-                    "action": r[3],
-                    "tagId": r[4],
-                    "keyword": r[5],
-                    "details": r[6],
-                    "createdAt": r[7],
-                }
-                for r in rows
-            ]
+            return [dict(zip(_TAG_HISTORY_KEYS, r)) for r in c.fetchall()]
 
     def add_tag_synonym(self, alias: str, canonical_keyword: str) -> dict:
         alias_norm = self._normalize_keyword(alias)
         tag_id = self._map_to_canonical_tag_id(canonical_keyword)
         if not alias_norm or not tag_id:
             return {"ok": False}
-        with self.get_connection() as conn:
+        with self._acquire_write() as conn:
             c = conn.cursor()
             c.execute("INSERT OR IGNORE INTO tag_synonyms (alias, tag_id) VALUES (?, ?)", (alias_norm, tag_id))
-            conn.commit()
-            return {"ok": True}
+        self._reload_tag_cache()
+        return {"ok": True}
 
     def remove_tag_synonym(self, alias: str) -> dict:
         alias_norm = self._normalize_keyword(alias)
-        with self.get_connection() as conn:
+        with self._acquire_write() as conn:
             c = conn.cursor()
             c.execute("DELETE FROM tag_synonyms WHERE alias = ?", (alias_norm,))
-            conn.commit()
-            return {"ok": True}
+        self._reload_tag_cache()
+        return {"ok": True}
 
     # --- Ratings ---
     def get_ratings_summary(self, recipe_id: int, user_id: Optional[int] = None) -> dict:
-        with self.get_connection() as conn:
+        with self._acquire_read() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT rating_average, rating_count FROM saved_recipes WHERE id = ?", (recipe_id,))
+            cursor.execute(SQL_RATING_SUMMARY, (recipe_id,))
             row = cursor.fetchone()
             average = row[0] if row else 0
             count = row[1] if row else 0
             user_value = None
             if user_id:
-                cursor.execute("SELECT value FROM ratings WHERE recipe_id = ? AND user_id = ?", (recipe_id, user_id))
+                cursor.execute(SQL_USER_RATING, (recipe_id, user_id))
                 r = cursor.fetchone()
                 user_value = r[0] if r else None
             return {"average": round(average or 0, 2), "count": count or 0, "userValue": user_value}
 
-    def _recalculate_recipe_rating(self, recipe_id: int):
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT COUNT(*), COALESCE(SUM(value), 0) FROM ratings WHERE recipe_id = ?", (recipe_id,))
-            row = cursor.fetchone()
-            count = row[0] or 0
-            total = row[1] or 0
-            average = round((total / count), 2) if count > 0 else 0
-            cursor.execute("UPDATE saved_recipes SET rating_average = ?, rating_count = ? WHERE id = ?", (average, count, recipe_id))
-            conn.commit()
-
     def upsert_rating(self, recipe_id: int, user_id: int, value: int) -> dict:
         if value < 1 or value > 5:
             raise ValueError("Rating must be between 1 and 5")
-        with self.get_connection() as conn:
+        with self._acquire_write() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT id FROM ratings WHERE recipe_id = ? AND user_id = ?", (recipe_id, user_id))
-            row = cursor.fetchone()
-            if row:
-                cursor.execute("UPDATE ratings SET value = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?", (value, row[0]))
-            else:
-                cursor.execute("INSERT INTO ratings (recipe_id, user_id, value) VALUES (?, ?, ?)", (recipe_id, user_id, value))
-            conn.commit()
-        self._recalculate_recipe_rating(recipe_id)
-        return self.get_ratings_summary(recipe_id, user_id)
+            # The rating triggers refresh saved_recipes' aggregates in this same transaction
+            cursor.execute(SQL_UPSERT_RATING + " RETURNING value", (recipe_id, user_id, value))
+            user_value = cursor.fetchone()[0]
+            return self._rating_summary(cursor, recipe_id, user_value)
 
     def delete_rating(self, recipe_id: int, user_id: int) -> dict:
-        with self.get_connection() as conn:
+        with self._acquire_write() as conn:
             cursor = conn.cursor()
             cursor.execute("DELETE FROM ratings WHERE recipe_id = ? AND user_id = ?", (recipe_id, user_id))
-            conn.commit()
-        self._recalculate_recipe_rating(recipe_id)
-        return self.get_ratings_summary(recipe_id, user_id)
+            return self._rating_summary(cursor, recipe_id, None)
+
+    @staticmethod
+    def _rating_summary(cursor, recipe_id: int, user_value: Optional[int]) -> dict:
+        """Summary shape of get_ratings_summary, read on the writer right after a rating change."""
+        cursor.execute(SQL_RATING_SUMMARY, (recipe_id,))
+        row = cursor.fetchone()
+        average = row[0] if row else 0
+        count = row[1] if row else 0
+        return {"average": round(average or 0, 2), "count": count or 0, "userValue": user_value}
 
     # --- Comments ---
     def create_comment(self, recipe_id: int, user_id: int, body: str, parent_id: Optional[int] = None) -> dict:
-        body = (body or '').strip()
-        if len(body) < 1 or len(body) > 2000:
-            raise ValueError("Comment length must be 1-2000 characters")
-        # simple banned words filter
-        banned = ["http://", "https://", "<script", "</script>"]
-        lowered = body.lower()
-        if any(b in lowered for b in banned):
-            raise ValueError("Comment contains forbidden content")
-        with self.get_connection() as conn:
+        body = _validate_comment_body(body)
+        with self._acquire_write() as conn:
             cursor = conn.cursor()
             cursor.execute(
-                "INSERT INTO comments (recipe_id, user_id, body, parent_id) VALUES (?, ?, ?, ?)",
+                "INSERT INTO comments (recipe_id, user_id, body, parent_id) VALUES (?, ?, ?, ?) " + self._comment_returning_sql,
                 (recipe_id, user_id, body, parent_id)
             )
-            comment_id = cursor.lastrowid
-            conn.commit()
-            return self.get_comment_dto(comment_id)
+            # A new comment has no likes yet
+            return self._build_comment_dto(cursor.fetchone(), 0, False)
+
+    def _build_comment_dto(self, row: sqlite3.Row, likes_count: int, liked_by_me: bool) -> dict:
+        # Access using alias keys to avoid index brittleness
+        username = row['user_username'] if self._comment_has_username else None
+        return {
+            "id": row['id'],
+            "recipeId": row['recipe_id'],
+            "user": {
+                "id": row['user_id'],
+                "displayName": username or row['user_full_name'],
+                "username": username,
+                "avatar": row['user_avatar'] if self._comment_has_avatar else None,
+            },
+            "body": "(raderad)" if row['deleted'] else row['body'],
+            "createdAt": row['created_at'],
+            "updatedAt": row['updated_at'],
+            "parentId": row['parent_id'],
+            "likesCount": likes_count,
+            "likedByMe": liked_by_me
+        }
 
     def get_comment_dto(self, comment_id: int, viewer_user_id: Optional[int] = None) -> Optional[dict]:
-        with self.get_connection() as conn:
+        with self._acquire_read() as conn:
             cursor = conn.cursor()
-            # Check user table columns to avoid selecting non-existent columns
-            cursor.execute("PRAGMA table_info(users)")
-            user_cols = {r[1] for r in cursor.fetchall()}
-            select_avatar = 'avatar_url' in user_cols
-            select_username = 'username' in user_cols
-            select_clause = (
-                "SELECT c.id, c.recipe_id, c.user_id, c.body, c.deleted, c.parent_id, "
-                "c.created_at, c.updated_at, u.full_name AS user_full_name"
-            )
-            if select_avatar:
-                select_clause += ", u.avatar_url AS user_avatar"
-            if select_username:
-                select_clause += ", u.username AS user_username"
-            query = (
-                select_clause +
-                " FROM comments c JOIN users u ON u.id = c.user_id WHERE c.id = ?"
-            )
-            cursor.execute(query, (comment_id,))
+            cursor.execute(self._comment_by_id_sql, (comment_id,))
             row = cursor.fetchone()
             if not row:
                 return None
-            # Access using alias keys to avoid index brittleness
-            row_d = dict(row)
-            body_text = "(raderad)" if row_d.get('deleted') else row_d.get('body')
-            display_name = row_d.get('user_username') or row_d.get('user_full_name')
-            avatar_value = row_d.get('user_avatar') if select_avatar else None
 
             # Likes summary
-            cursor.execute("SELECT COUNT(*) FROM comment_likes WHERE comment_id = ?", (comment_id,))
+            cursor.execute(SQL_COMMENT_LIKES_COUNT, (comment_id,))
             likes_count = cursor.fetchone()[0] or 0
             liked_by_me = False
             if viewer_user_id:
-                cursor.execute("SELECT 1 FROM comment_likes WHERE comment_id = ? AND user_id = ?", (comment_id, viewer_user_id))
+                cursor.execute(SQL_COMMENT_LIKED_BY, (comment_id, viewer_user_id))
                 liked_by_me = cursor.fetchone() is not None
-            return {
-                "id": row_d.get('id'),
-                "recipeId": row_d.get('recipe_id'),
-                "user": {"id": row_d.get('user_id'), "displayName": display_name, "username": row_d.get('user_username'), "avatar": avatar_value},
-                "body": body_text,
-                "createdAt": row_d.get('created_at'),
-                "updatedAt": row_d.get('updated_at'),
-                "parentId": row_d.get('parent_id'),
-                "likesCount": likes_count,
-                "likedByMe": liked_by_me
-            }
+            return self._build_comment_dto(row, likes_count, liked_by_me)
 
     def update_comment(self, comment_id: int, user_id: int, body: str, is_admin: bool) -> dict:
-        body = (body or '').strip()
-        if len(body) < 1 or len(body) > 2000:
-            raise ValueError("Comment length must be 1-2000 characters")
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT user_id FROM comments WHERE id = ?", (comment_id,))
-            row = cursor.fetchone()
-            if not row:
-                raise ValueError("Comment not found")
-            if row[0] != user_id and not is_admin:
-                raise PermissionError("Forbidden")
-            cursor.execute("UPDATE comments SET body = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?", (body, comment_id))
-            conn.commit()
-        dto = self.get_comment_dto(comment_id)
-        return dto
+        body = _validate_comment_body(body)
+        return self._update_own_comment(
+            "UPDATE comments SET body = ?, updated_at = CURRENT_TIMESTAMP", (body,), comment_id, user_id, is_admin
+        )
 
     def soft_delete_comment(self, comment_id: int, user_id: int, is_admin: bool) -> dict:
-        with self.get_connection() as conn:
+        return self._update_own_comment(
+            "UPDATE comments SET deleted = 1, updated_at = CURRENT_TIMESTAMP", (), comment_id, user_id, is_admin
+        )
+
+    def _update_own_comment(self, update_sql: str, params: tuple, comment_id: int, user_id: int, is_admin: bool) -> dict:
+        """Run `update_sql` on a comment the caller owns (or any comment for admins)
+        and return its DTO straight from RETURNING."""
+        with self._acquire_write() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT user_id FROM comments WHERE id = ?", (comment_id,))
+            cursor.execute(
+                update_sql + " WHERE id = ? AND (user_id = ? OR ?) " + self._comment_returning_sql,
+                (*params, comment_id, user_id, bool(is_admin))
+            )
             row = cursor.fetchone()
             if not row:
-                raise ValueError("Comment not found")
-            if row[0] != user_id and not is_admin:
+                cursor.execute("SELECT 1 FROM comments WHERE id = ?", (comment_id,))
+                if cursor.fetchone() is None:
+                    raise ValueError("Comment not found")
                 raise PermissionError("Forbidden")
-            cursor.execute("UPDATE comments SET deleted = 1, updated_at = CURRENT_TIMESTAMP WHERE id = ?", (comment_id,))
-            conn.commit()
-        dto = self.get_comment_dto(comment_id)
-        return dto
+            cursor.execute(SQL_COMMENT_LIKES_COUNT, (comment_id,))
+            return self._build_comment_dto(row, cursor.fetchone()[0] or 0, False)
 
     def list_comments(self, recipe_id: int, after_cursor: Optional[str], limit: int, sort: str, viewer_user_id: Optional[int] = None) -> dict:
-        # Cursor is base64 of "createdAt|id"
-        import base64
-        created_after = None
-        id_after = None
-        if after_cursor:
-            try:
-                decoded = base64.b64decode(after_cursor.encode()).decode()
-                parts = decoded.split('|')
-                created_after = parts[0]
-                id_after = int(parts[1]) if len(parts) > 1 else None
-            except Exception:
-                pass
+        created_after, id_after = _decode_comment_cursor(after_cursor)
         order_clause = "ORDER BY c.created_at DESC, c.id DESC" if sort == 'newest' else ("ORDER BY c.created_at ASC, c.id ASC" if sort == 'oldest' else "ORDER BY c.created_at DESC, c.id DESC")
-        params = [recipe_id]
+        params = [viewer_user_id, recipe_id]
         where_extra = ""
         if created_after and id_after is not None:
             # For DESC order
@@ -1790,27 +2135,20 @@ class DatabaseManager:
                 where_extra = " AND (c.created_at > ? OR (c.created_at = ? AND c.id > ?))"
             params.extend([created_after, created_after, id_after])
         query = f"""
-            SELECT c.id FROM comments c 
+            {self._comment_page_sql}
             WHERE c.recipe_id = ? AND (c.deleted IS NULL OR c.deleted = 0)
             {where_extra} {order_clause} LIMIT ?
         """
         params.append(limit + 1)
-        with self.get_connection() as conn:
+        with self._acquire_read() as conn:
             cursor = conn.cursor()
             cursor.execute(query, tuple(params))
             rows = cursor.fetchall()
-            ids = [r[0] for r in rows]
-            has_more = len(ids) > limit
-            ids = ids[:limit]
-            items: List[dict] = []
-            for cid in ids:
-                try:
-                    dto = self.get_comment_dto(cid, viewer_user_id)
-                    if dto:
-                        items.append(dto)
-                except Exception as _e:
-                    # Skip malformed rows instead of failing the whole request
-                    continue
+            has_more = len(rows) > limit
+            items: List[dict] = [
+                self._build_comment_dto(row, row['likes_count'], bool(row['liked_by_me']))
+                for row in rows[:limit]
+            ]
             next_cursor = None
             if has_more and len(items) > 0:
                 last = items[-1]
@@ -1822,34 +2160,30 @@ class DatabaseManager:
             return {"items": items, "nextCursor": next_cursor}
 
     def report_comment(self, comment_id: int, user_id: int, reason: str):
-        with self.get_connection() as conn:
+        with self._acquire_write() as conn:
             cursor = conn.cursor()
+            # A user can only report a comment once; repeats are no-ops
             cursor.execute(
-                "INSERT INTO comment_reports (comment_id, user_id, reason) VALUES (?, ?, ?)",
+                "INSERT OR IGNORE INTO comment_reports (comment_id, user_id, reason) VALUES (?, ?, ?)",
                 (comment_id, user_id, reason)
             )
-            conn.commit()
-            return {"ok": True}
+            return {"ok": True, "new": cursor.rowcount == 1}
 
     def toggle_comment_like(self, comment_id: int, user_id: int) -> dict:
-        with self.get_connection() as conn:
+        with self._acquire_write() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT 1 FROM comment_likes WHERE comment_id = ? AND user_id = ?", (comment_id, user_id))
-            existing = cursor.fetchone()
-            if existing:
-                cursor.execute("DELETE FROM comment_likes WHERE comment_id = ? AND user_id = ?", (comment_id, user_id))
-                liked = False
-            else:
-                cursor.execute("INSERT OR IGNORE INTO comment_likes (comment_id, user_id) VALUES (?, ?)", (comment_id, user_id))
-                liked = True
-            conn.commit()
-            cursor.execute("SELECT COUNT(*) FROM comment_likes WHERE comment_id = ?", (comment_id,))
+            # Try to like first; a conflict on the (comment_id, user_id) key means it was already liked
+            cursor.execute(SQL_COMMENT_LIKE_INSERT, (comment_id, user_id))
+            liked = cursor.fetchone() is not None
+            if not liked:
+                cursor.execute(SQL_COMMENT_LIKE_DELETE, (comment_id, user_id))
+            cursor.execute(SQL_COMMENT_LIKES_COUNT, (comment_id,))
             count = cursor.fetchone()[0] or 0
             return {"liked": liked, "count": count}
 
     # --- Roles Management ---
     def get_roles_for_user(self, user_id: int) -> List[str]:
-        with self.get_connection() as conn:
+        with self._acquire_read() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT role FROM user_roles WHERE user_id = ?", (user_id,))
             return [r[0] for r in cursor.fetchall()]
@@ -1857,17 +2191,15 @@ class DatabaseManager:
     def set_roles_for_user(self, user_id: int, roles: List[str]):
         allowed = {"guest", "user", "creator", "trusted", "moderator", "admin"}
         roles = [r for r in roles if r in allowed]
-        with self.get_connection() as conn:
+        with self._acquire_write() as conn:
             cursor = conn.cursor()
             cursor.execute("DELETE FROM user_roles WHERE user_id = ?", (user_id,))
-            for role in roles:
-                cursor.execute("INSERT OR IGNORE INTO user_roles (user_id, role) VALUES (?, ?)", (user_id, role))
-            conn.commit()
+            cursor.executemany("INSERT OR IGNORE INTO user_roles (user_id, role) VALUES (?, ?)", [(user_id, role) for role in roles])
 
     # ---------------------- Nutrition Snapshots API ----------------------
     def get_nutrition_snapshot(self, recipe_id: int) -> Optional[dict]:
         try:
-            with self.get_connection() as conn:
+            with self._acquire_read() as conn:
                 c = conn.cursor()
                 c.execute("SELECT snapshot, status, updated_at, meta FROM nutrition_snapshots WHERE recipe_id=?", (recipe_id,))
                 row = c.fetchone()
@@ -1889,7 +2221,7 @@ class DatabaseManager:
 
     def upsert_nutrition_snapshot(self, recipe_id: int, status: str, snapshot: Optional[dict] = None, meta: Optional[dict] = None):
         try:
-            with self.get_connection() as conn:
+            with self._acquire_write() as conn:
                 c = conn.cursor()
                 c.execute(
                     "INSERT INTO nutrition_snapshots (recipe_id, snapshot, status, updated_at, meta) VALUES (?,?,?,?,?)\n                     ON CONFLICT(recipe_id) DO UPDATE SET snapshot=excluded.snapshot, status=excluded.status, updated_at=CURRENT_TIMESTAMP, meta=excluded.meta",
@@ -1901,14 +2233,28 @@ class DatabaseManager:
                         json.dumps(meta) if meta is not None else None,
                     ),
                 )
-                conn.commit()
         except Exception as e:
             logger.error(f"upsert_nutrition_snapshot failed: {e}")
 
+    def bulk_upsert_pending(self, recipe_ids: List[int], meta: Optional[dict] = None):
+        """Mark several recipes' nutrition snapshots as pending in one write transaction.
+
+        Unlike the other upserts, sqlite errors propagate so the job queue can report them.
+        """
+        if not recipe_ids:
+            return
+        meta_json = json.dumps(meta) if meta is not None else None
+        now = datetime.now().isoformat(sep=' ', timespec='seconds')
+        with self._acquire_write() as conn:
+            conn.executemany(
+                "INSERT INTO nutrition_snapshots (recipe_id, snapshot, status, updated_at, meta) VALUES (?,NULL,'pending',?,?)\n                 ON CONFLICT(recipe_id) DO UPDATE SET snapshot=NULL, status='pending', updated_at=CURRENT_TIMESTAMP, meta=excluded.meta",
+                [(rid, now, meta_json) for rid in recipe_ids],
+            )
+
     # ---------------------- FDC Cache Helpers ----------------------
     def get_fdc_food(self, fdc_id: int) -> Optional[dict]:
         try:
-            with self.get_connection() as conn:
+            with self._acquire_read() as conn:
                 c = conn.cursor()
                 c.execute("SELECT json, updated_at FROM fdc_foods WHERE fdc_id=?", (fdc_id,))
                 row = c.fetchone()
@@ -1926,32 +2272,57 @@ class DatabaseManager:
 
     def upsert_fdc_food(self, fdc_id: int, data: dict):
         try:
-            with self.get_connection() as conn:
+            with self._acquire_write() as conn:
                 c = conn.cursor()
                 c.execute(
                     "INSERT INTO fdc_foods (fdc_id, json, updated_at) VALUES (?,?,?)\n                     ON CONFLICT(fdc_id) DO UPDATE SET json=excluded.json, updated_at=excluded.updated_at",
                     (fdc_id, json.dumps(data), datetime.now().isoformat(sep=' ', timespec='seconds')),
                 )
-                conn.commit()
         except Exception as e:
             logger.error(f"upsert_fdc_food failed: {e}")
 
+    def get_fdc_search(self, query: str) -> Optional[dict]:
+        try:
+            with self._acquire_read() as conn:
+                c = conn.cursor()
+                c.execute("SELECT fdc_id, description, data_type, score, updated_at FROM fdc_search_cache WHERE query=?", (query,))
+                row = c.fetchone()
+                if not row:
+                    return None
+                fdc_id, description, data_type, score, updated_at = row
+                return {"fdc_id": fdc_id, "description": description, "data_type": data_type, "score": score, "updated_at": updated_at}
+        except Exception as e:
+            logger.error(f"get_fdc_search failed: {e}")
+            return None
+
+    def upsert_fdc_search(self, query: str, fdc_id: Optional[int] = None, description: Optional[str] = None,
+                          data_type: Optional[str] = None, score: Optional[float] = None):
+        """Store the best FDC match for a query; leave fdc_id None to record that nothing matched."""
+        try:
+            with self._acquire_write() as conn:
+                c = conn.cursor()
+                c.execute(
+                    "INSERT INTO fdc_search_cache (query, fdc_id, description, data_type, score, updated_at) VALUES (?,?,?,?,?,?)\n                     ON CONFLICT(query) DO UPDATE SET fdc_id=excluded.fdc_id, description=excluded.description, data_type=excluded.data_type, score=excluded.score, updated_at=excluded.updated_at",
+                    (query, fdc_id, description, data_type, score, datetime.now().isoformat(sep=' ', timespec='seconds')),
+                )
+        except Exception as e:
+            logger.error(f"upsert_fdc_search failed: {e}")
+
     # ---------------------- Density Catalog Helpers ----------------------
     def upsert_density(self, category: str, form: str, g_per_ml: float, source: str):
         try:
-            with self.get_connection() as conn:
+            with self._acquire_write() as conn:
                 c = conn.cursor()
                 c.execute(
                     "INSERT INTO density_catalog (category, form, g_per_ml, source, updated_at) VALUES (?,?,?,?,CURRENT_TIMESTAMP)\n                     ON CONFLICT(category, form) DO UPDATE SET g_per_ml=excluded.g_per_ml, source=excluded.source, updated_at=CURRENT_TIMESTAMP",
                     (category, form, g_per_ml, source),
                 )
-                conn.commit()
         except Exception as e:
             logger.error(f"upsert_density failed: {e}")
 
     def get_density(self, category: str, form: str) -> Optional[float]:
         try:
-            with self.get_connection() as conn:
+            with self._acquire_read() as conn:
                 c = conn.cursor()
                 c.execute("SELECT g_per_ml FROM density_catalog WHERE category=? AND form=?", (category, form))
                 row = c.fetchone()
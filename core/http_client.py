@@ -1,7 +1,13 @@
 import asyncio
+import codecs
+import functools
 import logging
+import os
 import sqlite3
-from datetime import datetime, timedelta
+import threading
+import time
+from datetime import datetime
+from types import MappingProxyType
 from typing import Optional, Tuple
 from urllib.parse import urlparse
 
@@ -11,6 +17,12 @@ try:
 except Exception:
     _HAS_BROTLI = False
 
+try:
+    import zstandard as zstd  # type: ignore
+    _HAS_ZSTD = True
+except Exception:
+    _HAS_ZSTD = False
+
 import gzip
 
 import httpx
@@ -23,23 +35,124 @@ except Exception:
 
 logger = logging.getLogger(__name__)
 
+# Cached payloads start with a 1-byte codec tag so decoding needs no trial and error
+_FORMAT_RAW = b"\x00"
+_FORMAT_ZSTD = b"\x01"
+_FORMAT_BROTLI = b"\x02"
+_FORMAT_GZIP = b"\x03"
+
+# Untagged zstd rows written before the tag existed are recognised by the frame magic number
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+# Default per-domain request rate: this many requests per second, bursting up to the same number
+_DOMAIN_RATE = 4
+
+# Permanent client errors (4xx except 429) are served from the cache as errors for this long.
+# 429/5xx are transient: they are retried and never negatively cached.
+_NEGATIVE_CACHE_SECONDS = 3600
+
+
+def _is_permanent_error(status: Optional[int]) -> bool:
+    return bool(status) and 400 <= status < 500 and status != 429
+
+# Network failures worth retrying; anything else (bad URL, TLS, programming errors) fails at once
+_TRANSIENT_ERRORS = (httpx.ConnectError, httpx.TimeoutException, httpx.RemoteProtocolError)
+
+# Brotli responses decode slower than gzip for typical recipe pages, so it is opt-in (HTTP_ACCEPT_BR=1)
+_ACCEPT_BR = _HAS_BROTLI and os.getenv("HTTP_ACCEPT_BR") == "1"
+
+_DEFAULT_HEADERS = MappingProxyType({
+    "Accept": "text/html,application/xhtml+xml;q=0.9,application/xml;q=0.8",
+    "Accept-Encoding": ("br, gzip, deflate" if _ACCEPT_BR else "gzip, deflate"),
+    "User-Agent": (
+        "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_0) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/124.0 Safari/537.36"
+    ),
+    "Accept-Language": "sv-SE,sv;q=0.9,en-US;q=0.8,en;q=0.7",
+    "Cache-Control": "max-age=0",
+})
+
+# Hosts get HTTP/2 (when h2 is installed) only after this many requests; one-off hosts stay on HTTP/1.1
+_H2_MIN_HITS = 5
+
+# Cache writes are queued and flushed by one background task, at most this many rows per transaction
+_CACHE_WRITE_BATCH = 50
+
+
+def _normalize_etag(etag: Optional[str]) -> Optional[str]:
+    """Quote bare ETags so they round-trip as a valid If-None-Match; a W/ prefix is kept
+    because If-None-Match uses weak comparison and servers expect it back verbatim."""
+    if not etag or not etag.strip():
+        return None
+    etag = etag.strip()
+    weak = "W/" if etag[:2] in ("W/", "w/") else ""
+    tag = etag[len(weak):]
+    if len(tag) < 2 or not (tag.startswith('"') and tag.endswith('"')):
+        tag = '"' + tag.strip('"') + '"'
+    return weak + tag
+
+
+class CachedHTTPError(Exception):
+    """Raised by get_html for a URL that failed with a permanent 4xx within the negative-cache window."""
+
+    def __init__(self, status: int, url: str):
+        super().__init__(f"{status} (cached) for {url}")
+        self.status = status
+        self.url = url
+
 
 class _HTTPCache:
     """Lightweight ETag/Last-Modified cache persisted in SQLite.
 
     Schema:
       http_cache(url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, status INT,
-                 fetched_at TEXT, html_br BLOB)
+                 fetched_at TEXT, html_br BLOB, fetched_ts INTEGER)
+
+    fetched_ts (unix seconds) is what lookups use; fetched_at is kept as ISO text for humans.
+
+    One long-lived WAL connection, opened on first use, is shared by all calls;
+    the lock keeps statements from different threads from interleaving on it.
+    """
+
+    _SELECT_SQL = "SELECT etag, last_modified, status, fetched_ts, html_br FROM http_cache WHERE url = ?"
+    _UPSERT_SQL = """
+        INSERT INTO http_cache(url, etag, last_modified, status, fetched_at, html_br, fetched_ts)
+        VALUES(?,?,?,?,?,?,?)
+        ON CONFLICT(url) DO UPDATE SET
+            etag=excluded.etag,
+            last_modified=excluded.last_modified,
+            status=excluded.status,
+            fetched_at=excluded.fetched_at,
+            html_br=excluded.html_br,
+            fetched_ts=excluded.fetched_ts
     """
 
     def __init__(self, path: str = "http_cache.db"):
         self.path = path
-        self._init()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
 
-    def _init(self):
-        conn = sqlite3.connect(self.path)
-        c = conn.cursor()
-        c.execute(
+    def _connection(self) -> sqlite3.Connection:
+        """Open and migrate the cache file on first use; callers hold self._lock."""
+        if self._conn is None:
+            # Autocommit: each statement is its own transaction, no explicit commit() calls
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            for pragma in (
+                "PRAGMA journal_mode=WAL",
+                "PRAGMA synchronous=NORMAL",
+                "PRAGMA temp_store=MEMORY",
+                "PRAGMA cache_size=-65536",
+                "PRAGMA mmap_size=268435456",
+            ):
+                conn.execute(pragma)
+            self._init(conn)
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _init(conn: sqlite3.Connection):
+        conn.execute(
             """
             CREATE TABLE IF NOT EXISTS http_cache (
                 url TEXT PRIMARY KEY,
@@ -47,60 +160,112 @@ class _HTTPCache:
                 last_modified TEXT,
                 status INT,
                 fetched_at TEXT,
-                html_br BLOB
+                html_br BLOB,
+                fetched_ts INTEGER
             )
             """
         )
-        c.execute("CREATE INDEX IF NOT EXISTS idx_http_cache_status ON http_cache(status)")
-        conn.commit()
-        conn.close()
-
-    def get(self, url: str) -> Optional[Tuple[Optional[str], Optional[str], Optional[int], Optional[str], Optional[bytes]]]:
-        conn = sqlite3.connect(self.path)
-        c = conn.cursor()
-        c.execute("SELECT etag, last_modified, status, fetched_at, html_br FROM http_cache WHERE url = ?", (url,))
-        row = c.fetchone()
-        conn.close()
-        if not row:
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_http_cache_status ON http_cache(status)")
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(http_cache)")}
+        if "fetched_ts" not in columns:
+            # Older cache files: add the column and backfill it from the ISO timestamps once
+            conn.execute("ALTER TABLE http_cache ADD COLUMN fetched_ts INTEGER")
+            conn.execute(
+                "UPDATE http_cache SET fetched_ts = CAST(strftime('%s', fetched_at) AS INTEGER) "
+                "WHERE fetched_at IS NOT NULL"
+            )
+
+    def get(self, url: str) -> Optional[Tuple[Optional[str], Optional[str], Optional[int], Optional[int], Optional[bytes]]]:
+        with self._lock:
+            # status is an INT column written as int(), so the row already has the right shape
+            return self._connection().execute(self._SELECT_SQL, (url,)).fetchone()
+
+    def get_many(self, urls) -> dict:
+        """Cache rows for many URLs at once, keyed by URL; URLs without a row are left out."""
+        urls = list(dict.fromkeys(urls))
+        found = {}
+        with self._lock:
+            conn = self._connection()
+            # Stay well below SQLite's bound-parameter limit
+            for start in range(0, len(urls), 500):
+                chunk = urls[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                cursor = conn.execute(
+                    f"SELECT url, etag, last_modified, status, fetched_ts, html_br FROM http_cache WHERE url IN ({placeholders})",
+                    chunk,
+                )
+                for url, *row in cursor:
+                    found[url] = tuple(row)
+        return found
+
+    def _encode_payload(self, raw: Optional[bytes], cctx=None) -> Optional[bytes]:
+        # Compress UTF-8 HTML bytes with zstd (fast, good ratio), else brotli, else gzip
+        if raw is None:
             return None
-        return row[0], row[1], (int(row[2]) if row[2] is not None else None), row[3], row[4]
-
-    def upsert(self, url: str, etag: Optional[str], last_modified: Optional[str], status: int, html_text: Optional[str]):
-        # Compress HTML payload into brotli if available, else gzip for space efficiency
-        payload: Optional[bytes]
-        if html_text is None:
-            payload = None
-        else:
-            raw = html_text.encode("utf-8", errors="ignore")
+        try:
+            if cctx is not None:
+                return _FORMAT_ZSTD + cctx.compress(raw)
+            if _HAS_BROTLI:
+                return _FORMAT_BROTLI + brotli.compress(raw)
+            return _FORMAT_GZIP + gzip.compress(raw)
+        except Exception:
+            return _FORMAT_RAW + raw
+
+    def upsert(self, url: str, etag: Optional[str], last_modified: Optional[str], status: int, html_bytes: Optional[bytes]):
+        self.upsert_many([(url, etag, last_modified, status, html_bytes)])
+
+    def upsert_many(self, entries):
+        """Write (url, etag, last_modified, status, html_bytes) entries in a single transaction; bodies are UTF-8."""
+        fetched_ts = int(time.time())
+        fetched_at = datetime.utcfromtimestamp(fetched_ts).isoformat()
+        # Compressor contexts are not safe to share across threads; one per batch is cheap
+        cctx = zstd.ZstdCompressor(level=3) if _HAS_ZSTD else None
+        rows = [
+            (url, _normalize_etag(etag), last_modified, int(status), fetched_at, self._encode_payload(html_bytes, cctx), fetched_ts)
+            for url, etag, last_modified, status, html_bytes in entries
+        ]
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN")
             try:
-                if _HAS_BROTLI:
-                    payload = brotli.compress(raw)
-                else:
-                    payload = gzip.compress(raw)
+                conn.executemany(self._UPSERT_SQL, rows)
             except Exception:
-                payload = raw
-        conn = sqlite3.connect(self.path)
-        c = conn.cursor()
-        c.execute(
-            """
-            INSERT INTO http_cache(url, etag, last_modified, status, fetched_at, html_br)
-            VALUES(?,?,?,?,?,?)
-            ON CONFLICT(url) DO UPDATE SET
-                etag=excluded.etag,
-                last_modified=excluded.last_modified,
-                status=excluded.status,
-                fetched_at=excluded.fetched_at,
-                html_br=excluded.html_br
-            """,
-            (url, etag, last_modified, int(status), datetime.utcnow().isoformat(), payload),
-        )
-        conn.commit()
-        conn.close()
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    # Async wrappers: run the blocking SQLite/compression work in a worker thread
+    async def aget(self, url: str):
+        return await asyncio.to_thread(self.get, url)
+
+    async def aget_many(self, urls) -> dict:
+        return await asyncio.to_thread(self.get_many, urls)
+
+    async def aupsert(self, url: str, etag: Optional[str], last_modified: Optional[str], status: int, html_bytes: Optional[bytes]):
+        await asyncio.to_thread(self.upsert, url, etag, last_modified, status, html_bytes)
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
 
     def decode_payload(self, data: Optional[bytes]) -> Optional[str]:
         if data is None:
             return None
-        # Try brotli, then gzip, then raw
+        decoder = _PAYLOAD_DECODERS.get(data[:1])
+        if decoder is not None:
+            try:
+                return decoder(data[1:]).decode("utf-8", errors="ignore")
+            except Exception:
+                # An untagged legacy row that happens to start with a tag byte
+                pass
+        if _HAS_ZSTD and data[:4] == _ZSTD_MAGIC:
+            try:
+                return zstd.ZstdDecompressor().decompress(data).decode("utf-8", errors="ignore")
+            except Exception:
+                pass
+        # Older rows: try brotli, then gzip, then raw
         try:
             return brotli.decompress(data).decode("utf-8", errors="ignore") if _HAS_BROTLI else gzip.decompress(data).decode("utf-8", errors="ignore")
         except Exception:
@@ -113,105 +278,235 @@ class _HTTPCache:
                     return None
 
 
+_PAYLOAD_DECODERS = {_FORMAT_RAW: bytes, _FORMAT_GZIP: gzip.decompress}
+if _HAS_ZSTD:
+    # Decompressor contexts are not thread-safe, so each call gets its own
+    _PAYLOAD_DECODERS[_FORMAT_ZSTD] = lambda data: zstd.ZstdDecompressor().decompress(data)
+if _HAS_BROTLI:
+    _PAYLOAD_DECODERS[_FORMAT_BROTLI] = brotli.decompress
+
+
+class _TokenBucket:
+    """Per-domain request-rate limiter: `rate` requests per `per` seconds, bursting up to `rate`."""
+
+    _clock = staticmethod(time.monotonic)
+
+    def __init__(self, rate: float, per: float = 1.0):
+        self.rate = self._base_rate = rate
+        self.per = self._base_per = per
+        self._tokens = rate
+        self._updated = self._clock()
+        self._throttled_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def throttle(self, rate: float, per: float):
+        """Lower the rate for one `per` window (e.g. after a 429 with Retry-After) and drop any saved-up burst."""
+        self.rate = rate
+        self.per = per
+        self._tokens = 0.0
+        self._updated = self._clock()
+        self._throttled_until = self._updated + per
+
+    async def acquire(self):
+        # Waiters queue on the lock, so tokens are handed out in arrival order
+        async with self._lock:
+            while True:
+                now = self._clock()
+                self._tokens = min(self.rate, self._tokens + (now - self._updated) * self.rate / self.per)
+                self._updated = now
+                if self._throttled_until and now >= self._throttled_until:
+                    # Retry-After window is over; the burst refills at the normal rate from here
+                    self.rate, self.per = self._base_rate, self._base_per
+                    self._throttled_until = 0.0
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) * self.per / self.rate)
+
+
+def _retry_after_seconds(resp: httpx.Response) -> Optional[float]:
+    value = resp.headers.get("Retry-After")
+    try:
+        return max(float(value), 1.0) if value else None
+    except ValueError:
+        # HTTP-date form; the regular backoff covers it
+        return None
+
+
+@functools.lru_cache(maxsize=4096)
+def _domain_of(url: str) -> str:
+    return urlparse(url).netloc
+
+
+def _decode_body(resp: httpx.Response) -> Tuple[str, bytes]:
+    """Decode a response body once, returning (text, UTF-8 bytes for the cache).
+
+    UTF-8 pages (the common case) hand their raw bytes straight to the cache
+    instead of being decoded by resp.text and encoded again for storage.
+    """
+    raw = resp.content
+    encoding = resp.encoding or "utf-8"
+    text = raw.decode(encoding, errors="replace")
+    try:
+        is_utf8 = codecs.lookup(encoding).name == "utf-8"
+    except LookupError:
+        is_utf8 = False
+    return text, (raw if is_utf8 else text.encode("utf-8"))
+
+
 class AsyncHTTPClient:
-    """Shared httpx AsyncClient with HTTP/2, connection pooling, per-domain rate limiting, and conditional GET.
+    """Shared httpx AsyncClients with connection pooling, per-domain rate limiting, and conditional GET.
 
-    Use get_html(url) to fetch text/HTML only. Implements negative caching for 1 hour for 4xx/5xx.
+    Requests go over HTTP/1.1 keep-alive by default; hosts fetched repeatedly move to an HTTP/2 client.
+
+    Use get_html(url) to fetch text/HTML only. Permanent 4xx responses (not 429) are negatively
+    cached for _NEGATIVE_CACHE_SECONDS; 429/5xx are retried and never cached.
     """
 
     def __init__(self):
         self._client: Optional[httpx.AsyncClient] = None
+        self._h2_client: Optional[httpx.AsyncClient] = None
+        self._domain_hits: dict[str, int] = {}
+        self._inflight: dict[str, asyncio.Task] = {}
         self._cache = _HTTPCache()
         self._domain_limits: dict[str, asyncio.Semaphore] = {}
+        self._domain_rates: dict[str, _TokenBucket] = {}
         self._lock = asyncio.Lock()
+        self._write_q: Optional[asyncio.Queue] = None
+        self._writer_task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _new_client(http2: bool, limits: httpx.Limits) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            http2=http2,
+            headers=_DEFAULT_HEADERS,
+            timeout=httpx.Timeout(15.0, read=15.0, connect=10.0),
+            limits=limits,
+            follow_redirects=True,
+        )
 
     async def _get_client(self) -> httpx.AsyncClient:
         if self._client is not None:
             return self._client
         async with self._lock:
             if self._client is None:
-                headers = {
-                    "Accept": "text/html,application/xhtml+xml;q=0.9,application/xml;q=0.8",
-                    "Accept-Encoding": ("br, gzip" if _HAS_BROTLI else "gzip"),
-                    "User-Agent": (
-                        "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_0) "
-                        "AppleWebKit/537.36 (KHTML, like Gecko) "
-                        "Chrome/124.0 Safari/537.36"
-                    ),
-                    "Accept-Language": "sv-SE,sv;q=0.9,en-US;q=0.8,en;q=0.7",
-                    "Cache-Control": "max-age=0",
-                }
-                self._client = httpx.AsyncClient(
-                    http2=_HAS_H2,
-                    headers=headers,
-                    timeout=httpx.Timeout(15.0, read=15.0, connect=10.0),
-                    limits=httpx.Limits(max_keepalive_connections=20, max_connections=30),
-                    follow_redirects=True,
-                )
+                # HTTP/1.1 connections are cheap to keep around, so the pool is larger than the h2 one
+                self._client = self._new_client(False, httpx.Limits(max_keepalive_connections=64, max_connections=128))
+                self._write_q = asyncio.Queue()
+                self._writer_task = asyncio.create_task(self._cache_writer())
         return self._client
 
+    async def _client_for(self, domain: str) -> httpx.AsyncClient:
+        client = await self._get_client()
+        if not _HAS_H2:
+            return client
+        hits = self._domain_hits[domain] = self._domain_hits.get(domain, 0) + 1
+        if hits < _H2_MIN_HITS:
+            return client
+        if self._h2_client is None:
+            # No await between the check and the assignment, so no lock is needed
+            self._h2_client = self._new_client(True, httpx.Limits(max_keepalive_connections=20, max_connections=30))
+        return self._h2_client
+
+    async def _cache_writer(self):
+        """Drain queued cache writes, coalescing whatever piled up into one transaction."""
+        q = self._write_q
+        while True:
+            batch = [await q.get()]
+            while len(batch) < _CACHE_WRITE_BATCH and not q.empty():
+                batch.append(q.get_nowait())
+            try:
+                await asyncio.to_thread(self._cache.upsert_many, batch)
+            except Exception as e:
+                logger.warning(f"HTTP cache write failed for {len(batch)} rows: {e}")
+            finally:
+                for _ in batch:
+                    q.task_done()
+
     def _get_domain_semaphore(self, domain: str) -> asyncio.Semaphore:
         if domain not in self._domain_limits:
             # 2 concurrent, burst friendly
             self._domain_limits[domain] = asyncio.Semaphore(2)
         return self._domain_limits[domain]
 
+    def _get_domain_rate(self, domain: str) -> _TokenBucket:
+        bucket = self._domain_rates.get(domain)
+        if bucket is None:
+            bucket = self._domain_rates[domain] = _TokenBucket(_DOMAIN_RATE)
+        return bucket
+
     async def get_html(self, url: str) -> str:
-        parsed = urlparse(url)
-        domain = parsed.netloc
+        # Single-flight: concurrent callers for the same URL share one fetch (and one cache write)
+        task = self._inflight.get(url)
+        if task is None or task.done():
+            task = asyncio.ensure_future(self._fetch_html(url))
+            self._inflight[url] = task
+            task.add_done_callback(functools.partial(self._forget_inflight, url))
+        # Shielded so one cancelled caller does not cancel the fetch for the others
+        return await asyncio.shield(task)
+
+    def _forget_inflight(self, url: str, task: asyncio.Task):
+        # Done callbacks run a loop iteration late; leave a newer fetch for the URL in place
+        if self._inflight.get(url) is task:
+            del self._inflight[url]
+
+    async def _fetch_html(self, url: str) -> str:
+        domain = _domain_of(url)
         sem = self._get_domain_semaphore(domain)
+        rate = self._get_domain_rate(domain)
 
         # Check cache for conditional headers and negative caching
-        cached = self._cache.get(url)
-        headers = {}
+        cached = await self._cache.aget(url)
+        # Conditional headers only exist for cached URLs; None lets httpx skip the merge
+        headers = None
         if cached:
-            etag, last_mod, status, fetched_at, payload = cached
-            try:
-                if status and status >= 400 and fetched_at:
-                    # Negative cache for 1h
-                    fetched_dt = datetime.fromisoformat(fetched_at)
-                    if datetime.utcnow() - fetched_dt < timedelta(hours=1):
-                        raise httpx.HTTPStatusError("negative cache", request=None, response=None)  # handled below
-            except Exception:
-                pass
+            headers = {}
+            etag, last_mod, status, fetched_ts, payload = cached
+            # Negative cache: fail fast without touching the network
+            if _is_permanent_error(status) and fetched_ts and time.time() - fetched_ts < _NEGATIVE_CACHE_SECONDS:
+                raise CachedHTTPError(status, url)
             if etag:
                 headers["If-None-Match"] = etag
             if last_mod:
                 headers["If-Modified-Since"] = last_mod
 
-        client = await self._get_client()
+        client = await self._client_for(domain)
 
         backoff = 0.5
         for attempt in range(4):
             async with sem:
                 try:
+                    await rate.acquire()
                     resp = await client.get(url, headers=headers)
                     # 304 → use cached body
                     if resp.status_code == 304 and cached:
-                        html = self._cache.decode_payload(cached[4]) or ""
+                        html = await asyncio.to_thread(self._cache.decode_payload, cached[4]) or ""
                         if not html:
                             # Fallback: fetch fresh without conditionals
+                            await rate.acquire()
                             resp2 = await client.get(url)
-                            html = resp2.text
-                            self._cache.upsert(url, resp2.headers.get("ETag"), resp2.headers.get("Last-Modified"), resp2.status_code, html)
+                            html, body = _decode_body(resp2)
+                            self._write_q.put_nowait((url, resp2.headers.get("ETag"), resp2.headers.get("Last-Modified"), resp2.status_code, body))
                         return html
                     # Success
                     if 200 <= resp.status_code < 300:
-                        text = resp.text
-                        self._cache.upsert(url, resp.headers.get("ETag"), resp.headers.get("Last-Modified"), resp.status_code, text)
+                        text, body = _decode_body(resp)
+                        self._write_q.put_nowait((url, resp.headers.get("ETag"), resp.headers.get("Last-Modified"), resp.status_code, body))
                         return text
-                    # Client/Server error → store negative cache and raise
-                    self._cache.upsert(url, resp.headers.get("ETag"), resp.headers.get("Last-Modified"), resp.status_code, None)
-                    # 429/503 → backoff with jitter
-                    if resp.status_code in (429, 503):
+                    # Permanent client error → store negative cache and raise; a transient failure keeps the cached row
+                    if _is_permanent_error(resp.status_code):
+                        self._write_q.put_nowait((url, resp.headers.get("ETag"), resp.headers.get("Last-Modified"), resp.status_code, None))
+                    # 429/5xx → backoff with jitter; the last attempt raises below
+                    if (resp.status_code == 429 or resp.status_code >= 500) and attempt < 3:
+                        retry_after = _retry_after_seconds(resp)
+                        if retry_after is not None:
+                            # The site told us its pace: one request per Retry-After window until that window passes
+                            rate.throttle(1, retry_after)
                         await asyncio.sleep(backoff)
                         backoff = min(backoff * 2.0, 8.0) + (0.1 * attempt)
                         continue
                     resp.raise_for_status()
-                except httpx.HTTPStatusError as e:
-                    # If negative cached earlier, re-raise as simple error
-                    raise e
-                except Exception as e:
+                except _TRANSIENT_ERRORS as e:
                     if attempt < 3:
                         await asyncio.sleep(backoff)
                         backoff = min(backoff * 2.0, 8.0) + (0.1 * attempt)
@@ -222,10 +517,40 @@ class AsyncHTTPClient:
         raise RuntimeError("Failed to fetch HTML")
 
     async def aclose(self):
-        if self._client is not None:
-            try:
-                await self._client.aclose()
-            except Exception:
-                pass
+        if self._writer_task is not None:
+            # Flush pending cache writes before shutting down
+            await self._write_q.join()
+            self._writer_task.cancel()
+            self._writer_task = None
+        for client in (self._client, self._h2_client):
+            if client is not None:
+                try:
+                    await client.aclose()
+                except Exception:
+                    pass
+        self._cache.close()
+
+
+# Shared instance: one connection pool, rate limiter and cache writer per event loop.
+# Use get_http_client() (or get_html below) rather than constructing AsyncHTTPClient per caller.
+_shared_client: Optional[Tuple[asyncio.AbstractEventLoop, AsyncHTTPClient]] = None
+
+
+def get_http_client() -> AsyncHTTPClient:
+    """Return the shared client for the running event loop, creating it on first use.
+
+    The httpx clients, writer task and locks belong to the loop they were created on,
+    so a new loop (e.g. a second asyncio.run) gets a fresh client.
+    """
+    global _shared_client
+    loop = asyncio.get_running_loop()
+    if _shared_client is None or _shared_client[0] is not loop:
+        if _shared_client is not None:
+            # The previous loop is gone; its httpx clients cannot be awaited any more
+            _shared_client[1]._cache.close()
+        _shared_client = (loop, AsyncHTTPClient())
+    return _shared_client[1]
 
 
+async def get_html(url: str) -> str:
+    return await get_http_client().get_html(url)
@@ -1,32 +1,33 @@
 from passlib.context import CryptContext
 import hashlib
+import hmac
 import secrets
 
-# Konfigurera passlib för bcrypt, som är industristandard
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Konfigurera passlib för bcrypt, som är industristandard. Kostnaden låses
+# explicit så att äldre hashar med lägre kostnad uppgraderas vid inloggning.
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=12, bcrypt__min_rounds=12)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Verifierar ett lösenord mot en hash.
-    Försöker först verifiera med den säkra bcrypt-metoden. Om det misslyckas,
-    faller den tillbaka till att kontrollera det gamla, osäkra formatet (salt:hash)
-    för bakåtkompatibilitet.
+    Formatet avgörs direkt från hashen: bcrypt-hashar ($2...) verifieras med
+    passlib, det gamla osäkra formatet (salt:hash) kontrolleras direkt utan att
+    först gå via bcrypt, för bakåtkompatibilitet.
     """
-    try:
-        # Försök först med den nya, säkra metoden
-        if pwd_context.verify(plain_password, hashed_password):
-            return True
-    except (ValueError, TypeError):
-        # Om verifieringen misslyckas med ett undantag kan det vara det gamla formatet.
-        # Ett vanligt ValueError här är "not a valid bcrypt hash".
-        pass
+    if hashed_password.startswith("$2"):
+        try:
+            return pwd_context.verify(plain_password, hashed_password)
+        except (ValueError, TypeError):
+            # Trasig bcrypt-hash
+            return False
 
     # Fallback till det gamla, osäkra formatet
     if ":" in hashed_password:
         try:
             salt, password_hash = hashed_password.split(":")
-            verify_hash = hashlib.sha256((plain_password + salt).encode()).hexdigest()
-            return password_hash == verify_hash
+            verify_hash = hashlib.sha256((plain_password + salt).encode("utf-8")).hexdigest()
+            # Jämförelse i konstant tid så att svarstiden inte läcker hur många tecken som matchar
+            return hmac.compare_digest(password_hash.encode("utf-8"), verify_hash.encode("utf-8"))
         except ValueError:
             # Ogiltigt gammalt format
             return False
@@ -44,6 +45,9 @@ def needs_rehash(hashed_password: str) -> bool:
     """
     Kontrollerar om ett lösenord är hashat med en gammal metod och behöver
     uppdateras. En hash behöver hashas om ifall den inte är i det nya
-    bcrypt-formatet.
+    bcrypt-formatet, eller om den är en bcrypt-hash med inaktuella
+    parametrar (t.ex. lägre kostnad än pwd_context använder i dag).
     """
-    return not hashed_password.startswith("$2b$")
+    if not hashed_password.startswith("$2b$"):
+        return True
+    return pwd_context.needs_update(hashed_password)
@@ -1,7 +1,9 @@
-import asyncio
 import json
+import logging
 from logic.web_scraper import scrape_recipe_from_url
 
+log = logging.getLogger(__name__)
+
 def verify_scraper():
     """
     This script will test the web scraper functionality by fetching a recipe 
@@ -12,17 +14,16 @@ def verify_scraper():
     """
     test_url = "https://www.ica.se/recept/kramig-kycklinggryta-med-soltorkade-tomater-729340/"
     
-    print(f"--- Starting Scraper Verification ---")
-    print(f"Testing with URL: {test_url}")
+    log.info("--- Starting Scraper Verification ---")
+    log.info("Testing with URL: %s", test_url)
     
     try:
-        recipe_data = scrape_recipe_from_url(test_url, download_image=False)
+        recipe_data = scrape_recipe_from_url(test_url, should_download_image=False)
         
         if recipe_data:
-            print("\n--- SCRAPER RESULT (Structured JSON) ---")
-            # Use json.dumps for pretty printing the dictionary
-            print(json.dumps(recipe_data, indent=2, ensure_ascii=False))
-            print("\n--- VERIFICATION CHECKLIST ---")
+            # The full result is only serialised when DEBUG output is on
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug("--- SCRAPER RESULT (Structured JSON) ---\n%s", json.dumps(recipe_data, indent=2, ensure_ascii=False))
             
             checks = {
                 "Title": "title" in recipe_data and recipe_data["title"],
@@ -40,26 +41,24 @@ def verify_scraper():
                 "  - Carbs": "nutritional_information" in recipe_data and "carbohydrateContent" in recipe_data.get("nutritional_information", {}),
             }
             
-            all_passed = True
-            for name, passed in checks.items():
-                status = "✅ PASSED" if passed else "❌ FAILED"
-                if not passed:
-                    all_passed = False
-                print(f"{name.ljust(20)}: {status}")
-                
-            print("\n--- VERIFICATION SUMMARY ---")
-            if all_passed:
-                print("✅ All fields extracted successfully.")
+            # One log record for the whole checklist instead of one write per field
+            log.info("--- VERIFICATION CHECKLIST ---\n%s", "\n".join(
+                f"{name.ljust(20)}: {'✅ PASSED' if passed else '❌ FAILED'}" for name, passed in checks.items()
+            ))
+
+            if all(checks.values()):
+                log.info("✅ All fields extracted successfully.")
             else:
-                print("❌ Some fields failed extraction. Review the JSON output above.")
+                log.warning("❌ Some fields failed extraction. Run with LOG_LEVEL=DEBUG to see the JSON output.")
         else:
-            print("\n--- SCRAPER RESULT ---")
-            print("❌ FAILED: Scraper returned no data.")
+            log.error("❌ FAILED: Scraper returned no data.")
 
-    except Exception as e:
-        print(f"\n--- An error occurred during verification ---")
-        import traceback
-        traceback.print_exc()
+    except Exception:
+        log.exception("--- An error occurred during verification ---")
 
 if __name__ == "__main__":
+    import os
+    # basicConfig is a no-op if an imported module already configured logging, so set our own level too
+    logging.basicConfig(format='%(message)s')
+    log.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
     verify_scraper()
@@ -1,67 +1,176 @@
 import asyncio
+import functools
+import hashlib
+import json
 import logging
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 
 from core.database import db
-from logic.nutrition_calculator import NutritionCalculator
+from models.types import RecipeContent, SavedRecipe
+from logic.nutrition_calculator import get_shared_calculator
 from logic.safe_mode_calculator import compute_safe_snapshot
 
 logger = logging.getLogger(__name__)
 
-_queue: Optional[asyncio.Queue] = None
+# Job queue: a plain deque plus one Event workers park on while it is empty. No join()/task_done()
+# is needed here, so asyncio.Queue's per-get futures and bookkeeping buy nothing.
+_jobs: deque = deque()
+_jobs_ready = asyncio.Event()
+# Backpressure: enqueues beyond this many waiting jobs are refused instead of growing memory
+_MAX_QUEUED = 500
+# Most jobs a single worker runs at once
+_WORKER_BATCH = 8
+# SQLite calls run here instead of on the event loop; writes serialize on the db writer lock anyway
+_DB_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="nut-db")
 
+# Ready snapshots keyed on (ingredients, servings): recomputing an unchanged recipe is a lookup
+_RESULT_CACHE_SIZE = 1024
+_result_cache: "OrderedDict[str, dict]" = OrderedDict()
+# Running supervised worker tasks
+_worker_tasks: set = set()
+# Recipe ids queued but not yet picked up by a worker; repeat enqueues for them are no-ops
+_pending: set[int] = set()
+# Pending-status writes are coalesced: ids collect here and go to the DB in one transaction
+_PENDING_FLUSH_DELAY = 0.05
+_pending_writes: list[int] = []
+_pending_flush_lock = asyncio.Lock()
+_pending_flush_task: Optional[asyncio.Task] = None
 
-def get_queue() -> asyncio.Queue:
-    global _queue
-    if _queue is None:
-        _queue = asyncio.Queue()
-    return _queue
 
+async def _db(fn, *args, **kwargs):
+    """Run a blocking db call on the nutrition DB pool."""
+    return await asyncio.get_running_loop().run_in_executor(_DB_POOL, functools.partial(fn, *args, **kwargs))
 
-async def enqueue_nutrition_compute(recipe_id: int):
-    q = get_queue()
-    await q.put({"type": "nutrition.compute", "recipe_id": int(recipe_id)})
-    try:
-        db.upsert_nutrition_snapshot(int(recipe_id), status="pending", snapshot=None, meta={"reason": "enqueue"})
-    except Exception:
-        pass
+
+async def enqueue_nutrition_compute(recipe_id: int, force: bool = False) -> bool:
+    """Queue a nutrition recompute; False when the queue is full and the caller should back off.
+
+    force skips the in-process result cache, for manual recomputes that must reread FDC data and rules.
+    """
+    rid = int(recipe_id)
+    # Check and add with no await in between, so concurrent callers cannot both enqueue
+    if rid in _pending:
+        if force:
+            # Upgrade the job already waiting for this recipe
+            for job in _jobs:
+                if job.get("recipe_id") == rid:
+                    job["force"] = True
+        return True
+    if len(_pending) >= _MAX_QUEUED:
+        logger.warning("nutrition queue full (%d jobs), dropping recipe %s", len(_pending), rid)
+        return False
+    _pending.add(rid)
+    _pending_writes.append(rid)
+    global _pending_flush_task
+    if _pending_flush_task is None or _pending_flush_task.done():
+        _pending_flush_task = asyncio.create_task(_flush_pending_later())
+    _jobs.append({"type": "nutrition.compute", "recipe_id": rid, "force": force})
+    _jobs_ready.set()
+    return True
+
+
+async def _flush_pending():
+    """Write all buffered pending marks. Workers call this before computing, so a
+    pending write can never land after the job's result."""
+    async with _pending_flush_lock:
+        if not _pending_writes:
+            return
+        ids = _pending_writes[:]
+        _pending_writes.clear()
+        try:
+            await _db(db.bulk_upsert_pending, ids, meta={"reason": "enqueue"})
+        except Exception as e:
+            # The jobs are still queued; only the pending marker is missing
+            logger.warning("pending upsert failed for %d recipes (%s): %s", len(ids), ids[:10], e)
+
+
+async def _flush_pending_later():
+    await asyncio.sleep(_PENDING_FLUSH_DELAY)
+    await _flush_pending()
 
 
-async def _compute_nutrition_snapshot(recipe_id: int):
-    from models.types import SavedRecipe
+def _nonzero_count(result: Optional[dict]) -> int:
+    """Number of numeric, non-zero perServing values in a calculator result."""
+    per = (result or {}).get('perServing') or {}
+    return sum(1 for v in per.values() if isinstance(v, (int, float)) and v)
+
+
+def _coerce_servings(value, default: int = 4) -> int:
+    """Positive whole servings count, or `default` for anything else (bools, 2.5, "abc", 0)."""
+    # Plain ints (the usual case) pass straight through; bool is an int subclass, so type() not isinstance()
+    if type(value) is int:
+        return value if value >= 1 else default
+    if isinstance(value, float):
+        value = int(value) if value.is_integer() else default
+    elif isinstance(value, str):
+        try:
+            value = int(value.strip())
+        except ValueError:
+            return default
+    else:
+        return default
+    return value if value >= 1 else default
+
+
+def _result_key(raw_items: list, servings: int) -> str:
+    digest = hashlib.blake2b(json.dumps(raw_items, sort_keys=True).encode("utf-8"), digest_size=16).hexdigest()
+    return f"{digest}:{servings}"
+
+
+def _remember_result(key: str, result: dict):
+    _result_cache[key] = result
+    _result_cache.move_to_end(key)
+    if len(_result_cache) > _RESULT_CACHE_SIZE:
+        _result_cache.popitem(last=False)
+
+
+async def _compute_nutrition_snapshot(recipe_id: int, force: bool = False):
     try:
-        calc = NutritionCalculator()
         # Load recipe and build ingredient raw list
-        recipe: Optional[SavedRecipe] = db.get_saved_recipe(int(recipe_id))
+        recipe: Optional[SavedRecipe] = await _db(db.get_saved_recipe, int(recipe_id))
         if not recipe:
             logger.warning("nutrition.compute: recipe %s not found", recipe_id)
-            db.upsert_nutrition_snapshot(int(recipe_id), status="error", snapshot=None, meta={"error": "not_found"})
+            await _db(db.upsert_nutrition_snapshot, int(recipe_id), status="error", snapshot=None, meta={"error": "not_found"})
             return
-        content = recipe.recipe_content.dict() if hasattr(recipe.recipe_content, 'dict') else recipe.recipe_content
+        rc = recipe.recipe_content
+        # Dump only what the calculators read; instructions and the rest are never serialised
+        content = rc.model_dump(include={'ingredients', 'servings'}) if isinstance(rc, RecipeContent) else rc
         ingredients = content.get('ingredients') or []
-        servings = content.get('serves') or content.get('servings') or 4
-        try:
-            servings = int(servings) if isinstance(servings, (int, float, str)) and str(servings).isdigit() else 4
-        except Exception:
-            servings = 4
-        raw_items = []
-        for ing in ingredients:
-            if isinstance(ing, str):
-                raw_items.append({"raw": ing})
-            elif isinstance(ing, dict):
-                raw_items.append({"raw": f"{ing.get('quantity') or ''} {ing.get('name') or ''}".strip()})
+        servings = _coerce_servings(content.get('serves') or content.get('servings'))
+        raw_items = [
+            {"raw": ing} if isinstance(ing, str)
+            else {"raw": (str(ing.get('quantity') or '') + ' ' + str(ing.get('name') or '')).strip()}
+            for ing in ingredients
+            if isinstance(ing, (str, dict))
+        ]
+
+        # Nothing to calculate: skip both calculators and record why
+        if not raw_items:
+            await _db(db.upsert_nutrition_snapshot, int(recipe_id), status="error", snapshot=None, meta={"error": "no_ingredients"})
+            logger.warning("nutrition.compute: recipe %s has no ingredients", recipe_id)
+            return
+
+        cache_key = _result_key(raw_items, servings)
+        # Only repeat enqueues from edits are served from cache; forced runs always recompute
+        cached = None if force else _result_cache.get(cache_key)
+        if cached is not None:
+            _result_cache.move_to_end(cache_key)
+            await _db(db.upsert_nutrition_snapshot, int(recipe_id), status="ready", snapshot=cached, meta={"timing": {"total": 0}, "cached": True})
+            logger.info("nutrition.compute: recipe %s unchanged ingredients, reused cached snapshot", recipe_id)
+            return
         
         # Compute with timeout
-        import time
-        import asyncio
-        t0 = time.time()
+        t0 = time.perf_counter_ns()
         
         # Safe Mode first: fast and robust (with timeout)
         try:
             result = await asyncio.wait_for(compute_safe_snapshot(raw_items, servings), timeout=10.0)
         except asyncio.TimeoutError:
             logger.warning("nutrition.compute safe_mode timeout for recipe=%s", recipe_id)
-            db.upsert_nutrition_snapshot(int(recipe_id), status="error", snapshot=None, meta={"error": "safe_mode_timeout"})
+            await _db(db.upsert_nutrition_snapshot, int(recipe_id), status="error", snapshot=None, meta={"error": "safe_mode_timeout"})
             return
         except Exception as e:
             logger.warning("nutrition.compute safe_mode failed for recipe=%s: %s", recipe_id, e)
@@ -69,6 +178,8 @@ async def _compute_nutrition_snapshot(recipe_id: int):
         
         # Smart fallback logic: only use full calculator if safe mode really failed
         should_fallback = False
+        # One scan of perServing, reused by the empty-snapshot guard below unless the fallback replaces result
+        nonzero = _nonzero_count(result)
         if not result or not result.get('perServing'):
             should_fallback = True
             logger.info("nutrition.compute fallback: no result from safe mode for recipe=%s", recipe_id)
@@ -92,7 +203,8 @@ async def _compute_nutrition_snapshot(recipe_id: int):
         if should_fallback:
             try:
                 logger.info("nutrition.compute fallback to full calculator for recipe=%s", recipe_id)
-                result = await asyncio.wait_for(calc.calculate_nutrition(raw_items, servings, recipe_id=str(recipe_id)), timeout=30.0)
+                result = await asyncio.wait_for(get_shared_calculator().calculate_nutrition(raw_items, servings, recipe_id=str(recipe_id)), timeout=30.0)
+                nonzero = _nonzero_count(result)
                 # mark meta safe_mode=false if present
                 if isinstance(result, dict):
                     meta = result.get('meta') or {}
@@ -100,51 +212,72 @@ async def _compute_nutrition_snapshot(recipe_id: int):
                     result['meta'] = meta
             except asyncio.TimeoutError:
                 logger.warning("nutrition.compute full calculator timeout for recipe=%s", recipe_id)
-                db.upsert_nutrition_snapshot(int(recipe_id), status="error", snapshot=None, meta={"error": "full_calculator_timeout"})
+                await _db(db.upsert_nutrition_snapshot, int(recipe_id), status="error", snapshot=None, meta={"error": "full_calculator_timeout"})
                 return
             except Exception as _e_fb:
                 logger.warning("fallback calculator failed: %s", _e_fb)
 
         # Hard rule: never write a ready snapshot that is zero across all keys
-        try:
-            per = (result or {}).get('perServing', {})
-            nonzero = sum(1 for v in per.values() if isinstance(v, (int, float)) and v)
-            if nonzero == 0:
-                db.upsert_nutrition_snapshot(int(recipe_id), status="error", snapshot=None, meta={"error": "empty snapshot"})
-                logger.warning("nutrition.compute wrote error=empty snapshot for recipe=%s", recipe_id)
-                return
-        except Exception:
-            pass
-        t1 = time.time()
-        meta = {"timing": {"total": int((t1 - t0) * 1000)}}
-        db.upsert_nutrition_snapshot(int(recipe_id), status="ready", snapshot=result, meta=meta)
+        if nonzero == 0:
+            await _db(db.upsert_nutrition_snapshot, int(recipe_id), status="error", snapshot=None, meta={"error": "empty snapshot"})
+            logger.warning("nutrition.compute wrote error=empty snapshot for recipe=%s", recipe_id)
+            return
+        t1 = time.perf_counter_ns()
+        meta = {"timing": {"total": (t1 - t0) // 1_000_000}}
+        await _db(db.upsert_nutrition_snapshot, int(recipe_id), status="ready", snapshot=result, meta=meta)
+        _remember_result(cache_key, result)
         logger.info("nutrition.compute: recipe %s done in %sms", recipe_id, meta['timing']['total'])
     except Exception as e:
         logger.error("nutrition.compute failed for %s: %s", recipe_id, e)
-        db.upsert_nutrition_snapshot(int(recipe_id), status="error", snapshot=None, meta={"error": str(e)})
+        await _db(db.upsert_nutrition_snapshot, int(recipe_id), status="error", snapshot=None, meta={"error": str(e)})
+
+
+async def _dispatch(job: dict):
+    try:
+        jtype = job.get("type")
+        if jtype == "nutrition.compute":
+            # Released when the job starts, not when it ends: an edit made mid-compute
+            # must queue a fresh run rather than be absorbed by the stale one
+            _pending.discard(job.get("recipe_id"))
+            await _compute_nutrition_snapshot(job.get("recipe_id"), force=job.get("force", False))
+        else:
+            logger.warning("Unknown job type: %s", jtype)
+    except Exception as e:
+        logger.error("Job failed: %s", e)
 
 
 async def worker_loop():
-    q = get_queue()
     while True:
-        job = await q.get()
+        while not _jobs:
+            _jobs_ready.clear()
+            await _jobs_ready.wait()
+        # Write pending marks before taking jobs, so a failed or cancelled flush leaves them queued.
+        # Repeat until nothing is buffered or mid-write: enqueues can land while a flush awaits.
+        while _pending_writes or _pending_flush_lock.locked():
+            await _flush_pending()
+        # Take whatever is waiting (up to a cap) and run it concurrently; the jobs mostly await I/O
+        batch = [_jobs.popleft() for _ in range(min(len(_jobs), _WORKER_BATCH))]
+        await asyncio.gather(*(_dispatch(job) for job in batch), return_exceptions=True)
+
+
+async def _supervised_worker(worker_id: int):
+    """Run worker_loop, restarting it if it ever dies so the queue is never left without consumers."""
+    while True:
         try:
-            jtype = job.get("type")
-            if jtype == "nutrition.compute":
-                await _compute_nutrition_snapshot(job.get("recipe_id"))
-            else:
-                logger.warning("Unknown job type: %s", jtype)
-        except Exception as e:
-            logger.error("Job failed: %s", e)
-        finally:
-            q.task_done()
+            await worker_loop()
+        except Exception:
+            logger.exception("Job worker %d crashed; restarting", worker_id)
+            await asyncio.sleep(1)
 
 
 def start_worker_background(loop: Optional[asyncio.AbstractEventLoop] = None, num_workers: int = 2):
     try:
-        loop = loop or asyncio.get_event_loop()
+        loop = loop or asyncio.get_running_loop()
         for i in range(num_workers):
-            loop.create_task(worker_loop())
+            task = loop.create_task(_supervised_worker(i))
+            # The loop only keeps weak references to tasks; hold them here so workers are not collected
+            _worker_tasks.add(task)
+            task.add_done_callback(_worker_tasks.discard)
         logger.info("Job workers started (%d workers)", num_workers)
     except Exception as e:
         logger.error("Failed to start job workers: %s", e)
@@ -3,7 +3,9 @@ import logging
 import httpx
 import json
 import asyncio
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, replace
+from types import MappingProxyType
+from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Tuple, Any
 import os
 from logic.translator import translate_ingredient_name, GLOSSARY
@@ -13,6 +15,122 @@ from logic.portion_resolver import resolve_grams
 
 logger = logging.getLogger(__name__)
 
+# Density table for volume to weight conversion (g/ml)
+_DENSITIES = MappingProxyType({
+    'water': 1.0,
+    'vatten': 1.0,
+    'milk': 1.03,
+    'mjölk': 1.03,
+    'soy milk': 1.03,
+    'sojamjölk': 1.03,
+    'cream': 0.98,
+    'grädde': 0.98,
+    'oil': 0.92,
+    'olja': 0.92,
+    'rice': 0.85,
+    'ris': 0.85,
+    'flour': 0.53,
+    'vetemjöl': 0.53,
+    'sugar': 0.85,
+    'socker': 0.85,
+    'honey': 1.42,
+    'honung': 1.42,
+    'tomatoes': 1.05,
+    'tomater': 1.05,
+    'crushed tomatoes': 1.05,
+    'krossade tomater': 1.05,
+})
+
+# Unit conversion factors
+_UNIT_FACTORS = MappingProxyType({
+    # Weight
+    'g': 1.0, 'gram': 1.0, 'grams': 1.0, 'gramm': 1.0,
+    'kg': 1000.0, 'kilo': 1000.0,
+    # Volume
+    'ml': 1.0, 'milliliter': 1.0, 'milliliters': 1.0,
+    'l': 1000.0, 'liter': 1000.0, 'liters': 1000.0,
+    'dl': 100.0, 'deciliter': 100.0, 'deciliters': 100.0,
+    # Household measures
+    'tsk': 5.0, 'teaspoon': 5.0, 'teaspoons': 5.0, 'tsp': 5.0,
+    'msk': 15.0, 'tablespoon': 15.0, 'tablespoons': 15.0, 'tbsp': 15.0,
+    'krm': 1.0, 'kryddmått': 1.0,
+    # Pieces
+    'st': 1.0, 'styck': 1.0, 'stycken': 1.0, 'piece': 1.0, 'pieces': 1.0,
+    'burk': 1.0, 'burkar': 1.0, 'can': 1.0, 'cans': 1.0,
+    'paket': 1.0, 'package': 1.0, 'packages': 1.0,
+    'klyfta': 1.0, 'klyftor': 1.0, 'clove': 1.0, 'cloves': 1.0,
+    'cup': 240.0, 'cups': 240.0,
+})
+
+# Units recognised after a quantity; longest first so the engine settles on the right one without backtracking
+_UNIT_ALTERNATION = '|'.join(sorted((
+    'g', 'gram', 'grams', 'gramm', 'kg', 'kilo', 'ml', 'milliliter', 'milliliters', 'l', 'liter', 'liters',
+    'dl', 'deciliter', 'deciliters', 'tsk', 'teaspoon', 'teaspoons', 'tsp', 'msk', 'tablespoon', 'tablespoons',
+    'tbsp', 'krm', 'kryddmått', 'st', 'stycken', 'burk', 'burkar', 'can', 'cans', 'paket', 'package', 'packages',
+    'klyfta', 'klyftor', 'clove', 'cloves', 'cup', 'cups', 'piece', 'pieces',
+), key=len, reverse=True))
+# Ingredient line formats in one pattern, alternatives in priority order:
+#   "1 burk (400 g) krossade tomater"  parenthesized weight (any unit word)
+#   "300 gram rökt tofu" / "1/2 tsk salt"  known unit
+#   "300 rökt tofu" / "1/2 salt"  bare number
+_QUANTITY_UNIT_NAME = re.compile(
+    r'^(?:(?P<qty>\d+(?:[.,]\d+)?)'
+    r'(?:\s*(?P<pack>\w+)\s*\(\d+(?:[.,]\d+)?\s*(?:g|gram|kg)\s*\)|\s*(?P<unit>' + _UNIT_ALTERNATION + r'))?'
+    r'|(?P<frac>\d+/\d+)(?:\s*(?P<frac_unit>' + _UNIT_ALTERNATION + r'))?)'
+    r'\s+(?P<name>.+)$',
+    re.IGNORECASE,
+)
+# Freshness of cached FDC food details
+_FDC_FOOD_TTL = timedelta(days=14)
+# FDC's POST /foods accepts at most this many fdcIds per request
+_FDC_FOODS_PER_REQUEST = 20
+# FDC nutrient ids -> NutrientData fields (values are per 100 g)
+_NUTRIENT_ID_MAP = {
+    1008: 'calories',       # Energy (kcal)
+    1003: 'protein',        # Protein
+    1004: 'fat',            # Total lipid (fat)
+    1258: 'saturated_fat',  # Fatty acids, total saturated
+    1005: 'carbs',          # Carbohydrate, by difference
+    2000: 'sugar',          # Sugars, total including NLEA
+    1079: 'fiber',          # Fiber, total dietary
+    1093: 'sodium',         # Sodium, Na
+    1253: 'cholesterol',    # Cholesterol
+}
+# Freshness of cached FDC searches; misses expire sooner so new FDC entries get picked up
+_FDC_SEARCH_TTL = timedelta(days=14)
+_FDC_SEARCH_MISS_TTL = timedelta(days=1)
+# Unicode vulgar fractions -> "n/d", applied with a single str.translate pass
+_FRACTION_TABLE = str.maketrans({
+    '½': '1/2', '¼': '1/4', '¾': '3/4', '⅓': '1/3', '⅔': '2/3',
+    '⅕': '1/5', '⅖': '2/5', '⅗': '3/5', '⅘': '4/5',
+    '⅙': '1/6', '⅚': '5/6', '⅐': '1/7', '⅛': '1/8', '⅜': '3/8', '⅝': '5/8', '⅞': '7/8'
+})
+_UNICODE_MIXED_FRACTION = re.compile(r'(\d+)(½|¼|¾)')
+_FLAX_EGG = re.compile(r"linfröägg", re.I)
+_FLAX_EGG_RECIPE = re.compile(r"\(.*msk\s*linfrö\s*\+\s*.*msk\s*vatten.*\)", re.I)
+_FLAX_EGG_AMOUNTS = re.compile(r"(\d+[\.,]?\d*)\s*msk\s*linfrö\s*\+\s*(\d+[\.,]?\d*)\s*msk\s*vatten", re.I)
+_SWEDISH_CHARS = re.compile(r"[åäöÅÄÖ]")
+_LATIN_LOWER = re.compile(r"[a-z]")
+_QUERY_QUALIFIERS = re.compile(r"\b(light|smoked|vegan|traditional|old\s*style)\b", re.I)
+
+
+def _keyword_scanner(keywords) -> Tuple[re.Pattern, Dict[str, int]]:
+    """Pattern reporting, at every position of a name, the earliest-listed keyword starting there.
+
+    The lowest-ranked hit is then the first keyword, in the given order, that occurs anywhere in the
+    name, i.e. the same answer as looping over the table with `in`, from a single regex pass.
+    """
+    keywords = list(keywords)
+    pattern = re.compile('(?=(' + '|'.join(map(re.escape, keywords)) + '))')
+    return pattern, {k: i for i, k in reversed(list(enumerate(keywords)))}
+
+
+def _first_keyword(scanner: Tuple[re.Pattern, Dict[str, int]], text: str) -> Optional[str]:
+    pattern, rank = scanner
+    hits = pattern.findall(text)
+    return min(hits, key=rank.__getitem__) if hits else None
+
+
 @dataclass
 class ParsedIngredient:
     name: str
@@ -42,6 +160,24 @@ class NutrientData:
     sodium: Optional[float] = None
     cholesterol: Optional[float] = None
 
+def _nutrients_from_food(food: dict) -> NutrientData:
+    """Pick the nutrients we track out of an FDC food's foodNutrients"""
+    nutrients = NutrientData()
+    for nutrient in food.get('foodNutrients', []):
+        field = _NUTRIENT_ID_MAP.get(nutrient.get('nutrient', {}).get('id'))
+        if field:
+            setattr(nutrients, field, nutrient.get('amount', 0))
+    return nutrients
+
+
+def _is_fresh(updated_at, ttl: timedelta) -> bool:
+    """Whether an ISO timestamp from one of the FDC cache tables is younger than ttl"""
+    try:
+        return datetime.now() - datetime.fromisoformat(updated_at) <= ttl
+    except (TypeError, ValueError):
+        return False
+
+
 @dataclass
 class IngredientExplanation:
     parsed: Dict[str, Any]
@@ -58,116 +194,54 @@ class NutritionCalculator:
     def __init__(self):
         self.base_url = "https://api.nal.usda.gov/fdc/v1"
         self.fdc_api_key = os.getenv("FDC_API_KEY", "DEMO_KEY")
+        # Pooled FDC client, created on first request so it binds to the running loop
+        self._client: Optional[httpx.AsyncClient] = None
+        # Caps concurrent FDC requests when a recipe's lookups are fanned out
+        self._fdc_sem = asyncio.Semaphore(16)
         
-        # Density table for volume to weight conversion (g/ml)
-        self.densities = {
-            'water': 1.0,
-            'vatten': 1.0,
-            'milk': 1.03,
-            'mjölk': 1.03,
-            'soy milk': 1.03,
-            'sojamjölk': 1.03,
-            'cream': 0.98,
-            'grädde': 0.98,
-            'oil': 0.92,
-            'olja': 0.92,
-            'rice': 0.85,
-            'ris': 0.85,
-            'flour': 0.53,
-            'vetemjöl': 0.53,
-            'sugar': 0.85,
-            'socker': 0.85,
-            'honey': 1.42,
-            'honung': 1.42,
-            'tomatoes': 1.05,
-            'tomater': 1.05,
-            'crushed tomatoes': 1.05,
-            'krossade tomater': 1.05,
-        }
-        
-        # Unit conversion factors
-        self.unit_factors = {
-            # Weight
-            'g': 1.0, 'gram': 1.0, 'grams': 1.0, 'gramm': 1.0,
-            'kg': 1000.0, 'kilo': 1000.0,
-            # Volume
-            'ml': 1.0, 'milliliter': 1.0, 'milliliters': 1.0,
-            'l': 1000.0, 'liter': 1000.0, 'liters': 1000.0,
-            'dl': 100.0, 'deciliter': 100.0, 'deciliters': 100.0,
-            # Household measures
-            'tsk': 5.0, 'teaspoon': 5.0, 'teaspoons': 5.0, 'tsp': 5.0,
-            'msk': 15.0, 'tablespoon': 15.0, 'tablespoons': 15.0, 'tbsp': 15.0,
-            'krm': 1.0, 'kryddmått': 1.0,
-            # Pieces
-            'st': 1.0, 'styck': 1.0, 'stycken': 1.0, 'piece': 1.0, 'pieces': 1.0,
-            'burk': 1.0, 'burkar': 1.0, 'can': 1.0, 'cans': 1.0,
-            'paket': 1.0, 'package': 1.0, 'packages': 1.0,
-            'klyfta': 1.0, 'klyftor': 1.0, 'clove': 1.0, 'cloves': 1.0,
-            'cup': 240.0, 'cups': 240.0,
-        }
-        
-        # Swedish to English ingredient mapping
+        # Swedish to English ingredient mapping (one entry per key; partial matches prefer the longest key)
         self.swedish_to_english = {
-            'rökt tofu': 'smoked tofu',
-            'veganska korvar': 'vegan sausages',
-            'vegansk ost': 'vegan cheese',
-            'sojamjölk': 'soy milk',
-            'linfrö': 'flaxseed',
-            'linfröägg': 'flax egg',
-            'gammaldags idealmakaroner': 'traditional macaroni',
-            'makaroner': 'macaroni',
-            'makaronipudding': 'macaroni pudding',
-            'långpanna': 'baking pan',
-            'svartpeppar': 'black pepper',
-            'salt': 'salt',
-            'vatten': 'water',
-            'peppar': 'pepper',
-            'korvar': 'sausages',
-            'ost': 'cheese',
-            'mjölk': 'milk',
-            'linfröägg': 'flax egg',
-            'gammaldags': 'traditional',
-            'idealmakaroner': 'macaroni',
-            'svartpeppar': 'black pepper',
-            # Additional mappings for better coverage
+            # Pasta
             'gammaldags idealmakaroner': 'macaroni pasta',
             'idealmakaroner': 'macaroni pasta',
             'makaroner': 'macaroni pasta',
+            'makaronipudding': 'macaroni pudding',
+            'gammaldags': 'traditional',
             'pasta': 'pasta',
             'spaghetti': 'spaghetti',
             'penne': 'penne pasta',
             'farfalle': 'bow tie pasta',
-            'sojamjölk': 'soy milk',
-            'soja mjölk': 'soy milk',
+            # Plant-based
+            'rökt tofu': 'smoked tofu',
             'veganska korvar': 'vegan sausage',
             'vegansk korv': 'vegan sausage',
+            'korvar': 'sausages',
             'vegansk ost': 'vegan cheese',
             'vegansk feta': 'vegan feta cheese',
-            'linfröägg': 'flax egg',
+            'ost': 'cheese',
+            'sojamjölk': 'soy milk',
+            'soja mjölk': 'soy milk',
+            'mjölk': 'milk',
+            # Flax
+            'linfröägg (5 msk linfrö + 15 msk vatten)': 'flaxseed',
+            'linfröägg': 'flaxseed',
             'linfrö ägg': 'flax egg',
             'linfrö': 'flaxseed',
             'linfrön': 'flaxseeds',
+            # Seasoning
             'svartpeppar': 'black pepper',
             'svart peppar': 'black pepper',
+            'peppar': 'black pepper',
             'vitpeppar': 'white pepper',
             'vit peppar': 'white pepper',
-            'peppar': 'black pepper',
             'salt': 'salt',
             'havssalt': 'sea salt',
             'havs salt': 'sea salt',
+            # Water and equipment
             'vatten': 'water',
             'kranvatten': 'tap water',
             'kran vatten': 'tap water',
-            # Specific problematic ingredients from recipe 49
-            'gammaldags idealmakaroner': 'macaroni pasta',
-            'idealmakaroner': 'macaroni pasta',
-            'veganska korvar': 'vegan sausage',
-            'vegansk korv': 'vegan sausage',
-            'sojamjölk': 'soy milk',
-            'linfröägg (5 msk linfrö + 15 msk vatten)': 'flaxseed',
-            'linfröägg': 'flaxseed',
-            'peppar': 'black pepper',
-            'svartpeppar': 'black pepper',
+            'långpanna': 'baking pan',
         }
         
         # Vegan/plant-based keywords for cholesterol rule
@@ -177,6 +251,26 @@ class NutritionCalculator:
             'grönsaker', 'vegetables', 'frukt', 'fruit', 'linfrö', 'flaxseed'
         ]
 
+        # Substring lookups over the tables above, compiled once
+        self._density_scanner = _keyword_scanner(_DENSITIES)
+        self._translation_scanner = _keyword_scanner(sorted(self.swedish_to_english, key=len, reverse=True))
+        self._vegan_pattern = re.compile('|'.join(map(re.escape, self.vegan_keywords)))
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Shared keep-alive client for all FDC calls"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(10.0),
+                limits=httpx.Limits(max_connections=64, max_keepalive_connections=64),
+            )
+        return self._client
+
+    async def aclose(self):
+        """Close the pooled FDC client"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
     def _extract_quantity_unit_name(self, text: str) -> Tuple[Optional[float], Optional[str], str, bool]:
         """Extract quantity, unit, name, and optional flag from ingredient text"""
         text = text.strip()
@@ -189,71 +283,21 @@ class NutritionCalculator:
         # Handle Unicode fractions
         text = self._normalize_fractions(text)
         
-        # Patterns for different formats
-        patterns = [
-            # Parenthesized weight: "1 burk (400 g) krossade tomater"
-            r'^(\d+(?:[.,]\d+)?)\s*(\w+)\s*\((\d+(?:[.,]\d+)?)\s*(g|gram|kg)\s*\)\s+(.+)$',
-            # Standard format: "300 gram rökt tofu"
-            r'^(\d+(?:[.,]\d+)?)\s*(g|gram|grams|gramm|kg|kilo|ml|milliliter|milliliters|l|liter|liters|dl|deciliter|deciliters|tsk|teaspoon|teaspoons|tsp|msk|tablespoon|tablespoons|tbsp|krm|kryddmått|st|stycken|burk|burkar|can|cans|paket|package|packages|klyfta|klyftor|clove|cloves|cup|cups|piece|pieces)\s+(.+)$',
-            # Fraction format: "1/2 tsk salt"
-            r'^(\d+/\d+)\s*(g|gram|grams|gramm|kg|kilo|ml|milliliter|milliliters|l|liter|liters|dl|deciliter|deciliters|tsk|teaspoon|teaspoons|tsp|msk|tablespoon|tablespoons|tbsp|krm|kryddmått|st|stycken|burk|burkar|can|cans|paket|package|packages|klyfta|klyftor|clove|cloves|cup|cups|piece|pieces)\s+(.+)$',
-            # Generic number + text: "300 rökt tofu"
-            r'^(\d+(?:[.,]\d+)?)\s+(.+)$',
-            # Fraction + text: "1/2 salt"
-            r'^(\d+/\d+)\s+(.+)$',
-        ]
-        
-        for pattern in patterns:
-            match = re.match(pattern, text, re.IGNORECASE)
-            if match:
-                groups = match.groups()
-                
-                if len(groups) == 5:  # Parenthesized weight
-                    quantity_str = groups[0]
-                    unit = groups[1]
-                    weight_str = groups[2]
-                    weight_unit = groups[3]
-                    name = groups[4]
-                    
-                    # Convert quantity and weight
-                    quantity = self._parse_number(quantity_str)
-                    weight = self._parse_number(weight_str)
-                    
-                    # Use parenthesized weight for grams calculation
-                    grams = self._convert_to_grams(weight, weight_unit)
-                    return quantity, unit, name, optional
-                    
-                elif len(groups) == 3:  # Standard format
-                    quantity_str = groups[0]
-                    unit = groups[1]
-                    name = groups[2]
-                    
-                    quantity = self._parse_number(quantity_str)
-                    return quantity, unit, name, optional
-                    
-                elif len(groups) == 2:  # Generic format
-                    quantity_str = groups[0]
-                    name = groups[1]
-                    
-                    quantity = self._parse_number(quantity_str)
-                    return quantity, None, name, optional
+        match = _QUANTITY_UNIT_NAME.match(text)
+        if match:
+            quantity = self._parse_number(match.group('qty') or match.group('frac'))
+            unit = match.group('pack') or match.group('unit') or match.group('frac_unit')
+            return quantity, unit, match.group('name'), optional
         
         # No quantity found, return the whole text as name
         return None, None, text, optional
 
     def _normalize_fractions(self, text: str) -> str:
         """Convert Unicode fractions to standard format"""
-        fraction_map = {
-            '½': '1/2', '¼': '1/4', '¾': '3/4', '⅓': '1/3', '⅔': '2/3',
-            '⅕': '1/5', '⅖': '2/5', '⅗': '3/5', '⅘': '4/5',
-            '⅙': '1/6', '⅚': '5/6', '⅐': '1/7', '⅛': '1/8', '⅜': '3/8', '⅝': '5/8', '⅞': '7/8'
-        }
-        
-        for unicode_frac, standard_frac in fraction_map.items():
-            text = text.replace(unicode_frac, standard_frac)
+        text = text.translate(_FRACTION_TABLE)
         
         # Handle mixed numbers like "1½" -> "1 1/2"
-        text = re.sub(r'(\d+)(½|¼|¾)', r'\1 \2', text)
+        text = _UNICODE_MIXED_FRACTION.sub(r'\1 \2', text)
         
         return text
 
@@ -268,26 +312,16 @@ class NutritionCalculator:
         number_str = number_str.replace(',', '.')
         return float(number_str)
 
-    def _convert_to_grams(self, quantity: float, unit: str) -> float:
-        """Convert quantity and unit to grams"""
-        if not unit:
-            return quantity  # Assume grams if no unit
-        
-        unit_lower = unit.lower()
-        
-        if unit_lower in self.unit_factors:
-            return quantity * self.unit_factors[unit_lower]
-        
-        # Default: assume grams
-        return quantity
+    @staticmethod
+    def _convert_to_grams(quantity: float, unit: str) -> float:
+        """Convert quantity and unit to grams (no unit or an unknown unit: assume grams)"""
+        return quantity * _UNIT_FACTORS.get(unit.lower(), 1.0) if unit else quantity
 
     def _estimate_density(self, ingredient_name: str) -> float:
         """Estimate density for volume to weight conversion"""
-        name_lower = ingredient_name.lower()
-        
-        for keyword, density in self.densities.items():
-            if keyword in name_lower:
-                return density
+        keyword = _first_keyword(self._density_scanner, ingredient_name.lower())
+        if keyword is not None:
+            return _DENSITIES[keyword]
         
         # Default density for unknown ingredients
         return 1.0
@@ -295,7 +329,7 @@ class NutritionCalculator:
     def _is_vegan_ingredient(self, ingredient_name: str) -> bool:
         """Check if ingredient is vegan/plant-based for cholesterol rule"""
         name_lower = ingredient_name.lower()
-        return any(keyword in name_lower for keyword in self.vegan_keywords)
+        return self._vegan_pattern.search(name_lower) is not None
 
     def _translate_to_english(self, ingredient_name: str) -> str:
         """Translate Swedish ingredient names to English for FDC search"""
@@ -307,34 +341,29 @@ class NutritionCalculator:
             main_part = ingredient_name.split('(')[0].strip()
             name_lower = main_part.lower()
         
-        # Try exact matches first
-        for swedish, english in self.swedish_to_english.items():
-            if name_lower == swedish.lower():
-                if '(' in ingredient_name:
-                    return main_part.replace(swedish, english)
-                else:
-                    return ingredient_name.replace(swedish, english)
-        
-        # Try partial matches
-        for swedish, english in self.swedish_to_english.items():
-            if swedish.lower() in name_lower:
-                if '(' in ingredient_name:
-                    return main_part.replace(swedish, english)
-                else:
-                    return ingredient_name.replace(swedish, english)
+        # Try exact matches first, then partial matches (table keys are lowercase)
+        swedish = name_lower if name_lower in self.swedish_to_english else _first_keyword(self._translation_scanner, name_lower)
+        if swedish is not None:
+            english = self.swedish_to_english[swedish]
+            if '(' in ingredient_name:
+                return main_part.replace(swedish, english)
+            else:
+                return ingredient_name.replace(swedish, english)
         
         return ingredient_name
 
     def parse_ingredients(self, ingredients: List[Dict[str, str]]) -> List[ParsedIngredient]:
         """Parse raw ingredient strings into structured data"""
         parsed = []
+        # Cached by rules_loader and never raises (falls back to {}), so once per recipe is enough
+        rules = load_portion_rules()
         
         for ingredient in ingredients:
             raw = ingredient['raw']
             # Special split for flax egg: two ingredients (flaxseed + water)
-            if re.search(r"linfröägg", raw, re.I) and re.search(r"\(.*msk\s*linfrö\s*\+\s*.*msk\s*vatten.*\)", raw, re.I):
+            if _FLAX_EGG.search(raw) and _FLAX_EGG_RECIPE.search(raw):
                 try:
-                    m = re.search(r"(\d+[\.,]?\d*)\s*msk\s*linfrö\s*\+\s*(\d+[\.,]?\d*)\s*msk\s*vatten", raw, re.I)
+                    m = _FLAX_EGG_AMOUNTS.search(raw)
                     flax_tbsp = float(m.group(1).replace(',', '.'))
                     water_tbsp = float(m.group(2).replace(',', '.'))
                     flax_grams = flax_tbsp * 15.0 * 0.52  # 0.52 g/ml
@@ -350,7 +379,6 @@ class NutritionCalculator:
             # Calculate grams using portion rules + FDC portions + density
             grams = None
             try:
-                rules = load_portion_rules()
                 fdc_json = None
                 # If we already identified an FDC match later, we will recompute; here first pass without
                 resolved = resolve_grams(quantity, unit, name, fdc_json, rules)
@@ -400,7 +428,7 @@ class NutritionCalculator:
             name_main = ingredient_name.split('(')[0].strip()
             # Detect language: allow Swedish even without å/ä/ö if it matches known Swedish aliases
             lowered = name_main.lower()
-            has_swedish_chars = bool(re.search(r"[åäöÅÄÖ]", ingredient_name))
+            has_swedish_chars = bool(_SWEDISH_CHARS.search(ingredient_name))
             matches_sv_alias = any(alias in lowered for alias in GLOSSARY.keys())
             lang = 'sv' if (has_swedish_chars or matches_sv_alias) else 'en'
             t = translate_ingredient_name(name_main, lang, parsed_name=name_main)
@@ -410,7 +438,7 @@ class NutritionCalculator:
             t_class = t.get('class', 'NOMATCH')
             logger.info(f"Translate '{name_main}' -> '{english_name}' via {source} (conf={confidence}, class={t_class})")
             # Fallback: if looks untranslated and we assumed EN, try Swedish path once
-            if (source == 'fallback' and lang == 'en' and (not re.search(r"[a-z]", english_name.lower()) or english_name.strip().lower() == lowered)):
+            if (source == 'fallback' and lang == 'en' and (not _LATIN_LOWER.search(english_name.lower()) or english_name.strip().lower() == lowered)):
                 t = translate_ingredient_name(name_main, 'sv', parsed_name=name_main)
                 english_name = t.get('name_en') or name_main
                 confidence = t.get('confidence', 0.0)
@@ -422,7 +450,8 @@ class NutritionCalculator:
             async def _search(query: str, max_retries: int = 2):
                 for attempt in range(max_retries + 1):
                     try:
-                        async with httpx.AsyncClient() as client:
+                        client = self._get_client()
+                        async with self._fdc_sem:
                             response = await client.get(
                                 f"{self.base_url}/foods/search",
                                 params={
@@ -433,15 +462,15 @@ class NutritionCalculator:
                                 },
                                 timeout=10.0
                             )
-                            if response.status_code == 429:
-                                if attempt < max_retries:
-                                    await asyncio.sleep(1.0 * (attempt + 1))  # Exponential backoff
-                                    continue
-                                else:
-                                    logger.warning(f"FDC API rate limited after {max_retries} retries for query: {query}")
-                                    return None
-                            response.raise_for_status()
-                            return response.json()
+                        if response.status_code == 429:
+                            if attempt < max_retries:
+                                await asyncio.sleep(1.0 * (attempt + 1))  # Exponential backoff
+                                continue
+                            else:
+                                logger.warning(f"FDC API rate limited after {max_retries} retries for query: {query}")
+                                return None
+                        response.raise_for_status()
+                        return response.json()
                     except httpx.TimeoutException:
                         if attempt < max_retries:
                             await asyncio.sleep(0.5 * (attempt + 1))
@@ -473,8 +502,17 @@ class NutritionCalculator:
 
             # 2) Search FDC with full name
             # Skip FDC search for known non-nutritive items
-            if english_name.strip().lower() in ("water", "tap water"):
+            query_key = english_name.strip().lower()
+            if query_key in ("water", "tap water"):
                 return None
+            # Reuse an earlier search for the same translated name, including "nothing matched"
+            cached = db.get_fdc_search(query_key)
+            if cached is not None:
+                ttl = _FDC_SEARCH_TTL if cached['fdc_id'] else _FDC_SEARCH_MISS_TTL
+                if _is_fresh(cached['updated_at'], ttl):
+                    if not cached['fdc_id']:
+                        return None
+                    return FdcMatch(fdc_id=int(cached['fdc_id']), description=cached['description'], match_score=cached['score'], data_type=cached['data_type'])
             data = await _search(english_name)
             # If primary search has no foods, try simplified fallback query
             if not data.get('foods'):
@@ -489,25 +527,26 @@ class NutritionCalculator:
                 }
                 fallback_query = simple_map.get(english_name.lower())
                 if not fallback_query:
-                    fallback_query = re.sub(r"\b(light|smoked|vegan|traditional|old\s*style)\b", "", english_name, flags=re.I).strip()
+                    fallback_query = _QUERY_QUALIFIERS.sub("", english_name).strip()
                 data = await _search(fallback_query)
                 if not data.get('foods'):
+                    db.upsert_fdc_search(query_key)
                     return None
 
             # Score best match across whatever foods we have
             best_match = None
             best_score = 0.0
+            name_lower = english_name.lower()
+            name_words = frozenset(name_lower.split())
+            len_name_words = len(name_words)
             for food in data.get('foods', []):
                 description = food.get('description', '').lower()
-                name_lower = english_name.lower()
-                name_words = set(name_lower.split())
-                desc_words = set(description.split())
+                desc_words = frozenset(description.split())
                 score = 0.0
                 if name_words and desc_words:
-                    overlap = len(name_words.intersection(desc_words))
-                    total = len(name_words.union(desc_words))
-                    score = overlap / total if total > 0 else 0.0
-                if description.startswith(name_lower) or name_lower in description:
+                    overlap = len(name_words & desc_words)
+                    score = overlap / (len_name_words + len(desc_words) - overlap)
+                if name_lower in description:
                     score += 0.3
                 if score > best_score:
                     best_score = score
@@ -517,32 +556,30 @@ class NutritionCalculator:
                         match_score=score,
                         data_type=food.get('dataType', 'Unknown')
                     )
+                    # Identical word sets plus the substring bonus; no later food can score higher
+                    if score >= 1.3:
+                        break
 
             if best_match and best_score >= 0.25:
+                # Fill in the canonical row's FDC id and record this name as its alias, in one transaction
                 try:
                     with db.get_connection() as conn:
                         c = conn.cursor()
                         c.execute("SELECT id, fdc_id FROM canonical_ingredients WHERE LOWER(name_en) = LOWER(?)", (english_name,))
                         row = c.fetchone()
-                        if row and not row[1]:
-                            c.execute("UPDATE canonical_ingredients SET fdc_id = ? WHERE id = ?", (str(best_match.fdc_id), row[0]))
-                            conn.commit()
-                except Exception as e:
-                    logger.warning(f"Persisting FDC id on canonical failed: {e}")
-                try:
-                    with db.get_connection() as conn:
-                        c = conn.cursor()
-                        c.execute("SELECT id FROM canonical_ingredients WHERE LOWER(name_en) = LOWER(?)", (english_name,))
-                        canon = c.fetchone()
-                        if canon:
+                        if row:
+                            if not row[1]:
+                                c.execute("UPDATE canonical_ingredients SET fdc_id = ? WHERE id = ?", (str(best_match.fdc_id), row[0]))
                             c.execute(
                                 "INSERT OR IGNORE INTO ingredient_aliases (alias_text, lang, canonical_ingredient_id, confidence) VALUES (?, 'sv', ?, 0.9)",
-                                (ingredient_name.lower(), canon[0])
+                                (ingredient_name.lower(), row[0])
                             )
                             conn.commit()
                 except Exception as e:
-                    logger.warning(f"Persisting alias failed: {e}")
+                    logger.warning(f"Persisting FDC match on canonical failed: {e}")
+                db.upsert_fdc_search(query_key, best_match.fdc_id, best_match.description, best_match.data_type, best_match.match_score)
                 return best_match
+            db.upsert_fdc_search(query_key)
             return None
                 
         except Exception as e:
@@ -550,13 +587,12 @@ class NutritionCalculator:
             return None
 
     async def fetch_fdc_nutrients(self, fdc_id: int) -> Optional[NutrientData]:
-        """Fetch nutrient data for FDC ID"""
+        """Fetch nutrient data for one FDC ID (recipe calculations batch through fetch_nutrients_for)"""
         try:
             # Use DB cache first (14 days freshness)
             cached = db.get_fdc_food(int(fdc_id))
             data = None
             if cached and cached.get('json'):
-                from datetime import datetime, timedelta
                 try:
                     ts = cached.get('updated_at')
                     fresh = True
@@ -569,85 +605,73 @@ class NutritionCalculator:
                 except Exception:
                     pass
             if data is None:
-                async with httpx.AsyncClient() as client:
+                client = self._get_client()
+                async with self._fdc_sem:
                     response = await client.get(
                         f"{self.base_url}/food/{fdc_id}",
                         params={'api_key': self.fdc_api_key},
                         timeout=10.0
                     )
-                    response.raise_for_status()
-                    data = response.json()
-                    # persist cache
-                    try:
-                        db.upsert_fdc_food(int(fdc_id), data)
-                    except Exception:
-                        pass
-                
-                nutrients = NutrientData()
-                
-                # Extract nutrients from foodNutrients
-                for nutrient in data.get('foodNutrients', []):
-                    nutrient_id = nutrient.get('nutrient', {}).get('id')
-                    value = nutrient.get('amount', 0)
-                    
-                    # Map FDC nutrient IDs to our fields
-                    if nutrient_id == 1008:  # Energy (kcal)
-                        nutrients.calories = value
-                    elif nutrient_id == 1003:  # Protein
-                        nutrients.protein = value
-                    elif nutrient_id == 1004:  # Total lipid (fat)
-                        nutrients.fat = value
-                    elif nutrient_id == 1258:  # Fatty acids, total saturated
-                        nutrients.saturated_fat = value
-                    elif nutrient_id == 1005:  # Carbohydrate, by difference
-                        nutrients.carbs = value
-                    elif nutrient_id == 2000:  # Sugars, total including NLEA
-                        nutrients.sugar = value
-                    elif nutrient_id == 1079:  # Fiber, total dietary
-                        nutrients.fiber = value
-                    elif nutrient_id == 1093:  # Sodium, Na
-                        nutrients.sodium = value
-                    elif nutrient_id == 1253:  # Cholesterol
-                        nutrients.cholesterol = value
-                
-                return nutrients
+                response.raise_for_status()
+                data = response.json()
+                # persist cache
+                try:
+                    db.upsert_fdc_food(int(fdc_id), data)
+                except Exception:
+                    pass
+            
+            return _nutrients_from_food(data)
                 
         except Exception as e:
             logger.error(f"Error fetching FDC nutrients for {fdc_id}: {e}")
             return None
 
+    async def find_fdc_matches(self, names: List[str]) -> List[Optional[FdcMatch]]:
+        """Match all ingredients concurrently (bounded by _fdc_sem); results keep the input order"""
+        return await asyncio.gather(*(self.find_fdc_match(name) for name in names))
+
+    async def fetch_nutrients_for(self, ids: List[int]) -> Dict[int, NutrientData]:
+        """Nutrients for several FDC ids from one batched foods lookup; ids that could not be fetched are absent"""
+        foods = await self.fetch_fdc_foods_batch(list(dict.fromkeys(int(fid) for fid in ids)))
+        return {fid: _nutrients_from_food(food) for fid, food in foods.items()}
+
+    async def _post_foods(self, ids: List[int]) -> List[dict]:
+        client = self._get_client()
+        async with self._fdc_sem:
+            response = await client.post(
+                f"{self.base_url}/foods",
+                params={'api_key': self.fdc_api_key},
+                json={"fdcIds": ids},
+                timeout=15.0
+            )
+        response.raise_for_status()
+        return response.json() or []
+
     async def fetch_fdc_foods_batch(self, ids: List[int]) -> Dict[int, dict]:
         """Batch fetch foods (best-effort): use cache, then POST /v1/foods for misses."""
         result: Dict[int, dict] = {}
         misses: List[int] = []
-        # 1) Try cache
+        # 1) Try cache (same 14-day freshness as fetch_fdc_nutrients)
         for fid in ids:
             cached = db.get_fdc_food(int(fid))
-            if cached and cached.get('json'):
+            if cached and cached.get('json') and _is_fresh(cached.get('updated_at'), _FDC_FOOD_TTL):
                 result[int(fid)] = cached['json']
             else:
                 misses.append(int(fid))
-        # 2) Batch fetch
+        # 2) Batch fetch, in chunks of the most ids FDC accepts per request
         if misses:
-            try:
-                async with httpx.AsyncClient() as client:
-                    response = await client.post(
-                        f"{self.base_url}/foods",
-                        params={'api_key': self.fdc_api_key},
-                        json={"fdcIds": misses},
-                        timeout=15.0
-                    )
-                    response.raise_for_status()
-                    arr = response.json() or []
-                    for item in arr:
-                        fid = int(item.get('fdcId'))
-                        result[fid] = item
-                        try:
-                            db.upsert_fdc_food(fid, item)
-                        except Exception:
-                            pass
-            except Exception as e:
-                logger.warning(f"Batch foods fetch failed: {e}")
+            chunks = [misses[i:i + _FDC_FOODS_PER_REQUEST] for i in range(0, len(misses), _FDC_FOODS_PER_REQUEST)]
+            for chunk, arr in zip(chunks, await asyncio.gather(*(self._post_foods(chunk) for chunk in chunks), return_exceptions=True)):
+                if isinstance(arr, Exception):
+                    logger.warning(f"Batch foods fetch failed for {chunk}: {arr}")
+                    continue
+                for item in arr:
+                    fid = int(item.get('fdcId'))
+                    result[fid] = item
+                    try:
+                        db.upsert_fdc_food(fid, item)
+                    except Exception:
+                        pass
         return result
 
     def _apply_special_rules(self, ingredient: ParsedIngredient, nutrients: NutrientData) -> List[str]:
@@ -749,10 +773,10 @@ class NutritionCalculator:
                 calc_formula = ''
                 try:
                     if unit_used.lower() in ['g', 'gram', 'grams', 'gramm', 'kg', 'kilo'] and ingredient.quantity is not None:
-                        per_unit = self.unit_factors.get(unit_used.lower(), 1.0)
+                        per_unit = _UNIT_FACTORS.get(unit_used.lower(), 1.0)
                         calc_formula = f"{ingredient.quantity} {unit_used} × {per_unit} g/{unit_used} = {round(ingredient.grams,2)} g"
                     elif unit_used and ingredient.quantity is not None:
-                        ml = self.unit_factors.get(unit_used.lower(), 1.0)
+                        ml = _UNIT_FACTORS.get(unit_used.lower(), 1.0)
                         dens = self._estimate_density(ingredient.name)
                         calc_formula = f"{ingredient.quantity} {unit_used} × {ml} ml/{unit_used} × {dens} g/ml = {round(ingredient.grams,2)} g"
                     else:
@@ -876,6 +900,15 @@ class NutritionCalculator:
             
             for ingredient in parsed_ingredients:
                 ingredient.grams = self.normalize_to_grams(ingredient)
+            # One concurrent round of FDC searches, then one batched foods request for every match
+            matches = await self.find_fdc_matches([ingredient.name for ingredient in parsed_ingredients])
+            nutrients_by_id = await self.fetch_nutrients_for([m.fdc_id for m in matches if m])
+
+            for ingredient, fdc_match in zip(parsed_ingredients, matches):
+                nutrients = None
+                if fdc_match and int(fdc_match.fdc_id) in nutrients_by_id:
+                    # Copied per ingredient: special rules mutate it, and several ingredients can share an FDC id
+                    nutrients = replace(nutrients_by_id[int(fdc_match.fdc_id)])
                 logger.info(f"Processing ingredient: {ingredient.name} ({ingredient.grams}g)")
                 
                 # Create explanation object
@@ -894,7 +927,7 @@ class NutritionCalculator:
                 )
                 # Store translation info on explanation for transparency
                 lowered = ingredient.name.lower()
-                has_swedish_chars = bool(re.search(r"[åäöÅÄÖ]", ingredient.name))
+                has_swedish_chars = bool(_SWEDISH_CHARS.search(ingredient.name))
                 matches_sv_alias = any(alias in lowered for alias in GLOSSARY.keys())
                 lang = 'sv' if (has_swedish_chars or matches_sv_alias) else 'en'
                 t = translate_ingredient_name(ingredient.name, lang, parsed_name=ingredient.name, quantity=ingredient.quantity, unit=ingredient.unit)
@@ -906,12 +939,8 @@ class NutritionCalculator:
                 if t_class in ('LOW','NOMATCH') and ingredient.name not in needs_review:
                     needs_review.append(ingredient.name)
                 
-                # Find FDC match
-                fdc_match = await self.find_fdc_match(ingredient.name)
-                
                 if fdc_match:
                     logger.info(f"Found FDC match for {ingredient.name}: {fdc_match.description} (score: {fdc_match.match_score})")
-                    nutrients = await self.fetch_fdc_nutrients(fdc_match.fdc_id)
                     logger.info(f"Nutrients for {ingredient.name}: {nutrients}")
                     
                     if nutrients is None:
@@ -1012,3 +1041,20 @@ class NutritionCalculator:
                 },
                 'needsReview': []
             }
+
+
+_shared_calculator: Optional[NutritionCalculator] = None
+
+
+def get_shared_calculator() -> NutritionCalculator:
+    """Process-wide calculator, so every caller reuses one FDC connection pool.
+    Its lookup tables are read-only, which makes sharing across concurrent jobs safe."""
+    global _shared_calculator
+    if _shared_calculator is None:
+        _shared_calculator = NutritionCalculator()
+    return _shared_calculator
+
+
+async def close_shared_calculator():
+    if _shared_calculator is not None:
+        await _shared_calculator.aclose()
@@ -29,11 +29,10 @@ except Exception:  # pragma: no cover
     ChatDeepSeek = None
 
 from core.config import settings
-from core.http_client import AsyncHTTPClient
+from core.http_client import get_html as _get_html
 from core.database import db
 
 logger = logging.getLogger(__name__)
-_http_client = AsyncHTTPClient()
 
 def download_image(image_url: str, job_id: str) -> Optional[str]:
     """Laddar ner bild från URL och sparar lokalt"""
@@ -1165,7 +1164,7 @@ class FlexibleWebCrawler:
     
     async def _fetch_html_simple(self, url: str) -> str:
         """Hämtar HTML via delad httpx-klient (HTTP/2, pooling, ETag)."""
-        return await _http_client.get_html(url)
+        return await _get_html(url)
     
     async def _fetch_html_with_playwright(self, url: str) -> str:
         """Hämtar HTML med Playwright med resursblockering och tidig exit."""
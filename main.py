@@ -16,6 +16,7 @@ from api.auth_routes import router as auth_router
 from api.google_auth import router as google_auth_router
 from logic.video_processing import preload_vision_models
 from logic.job_queue import start_worker_background
+from logic.nutrition_calculator import close_shared_calculator
 
 # --- App Initialization ---
 # Always load .env and override to ensure fresh keys are picked up on restart
@@ -80,6 +81,21 @@ async def startup_event():
     except Exception as e:
         logging.error(f"Failed to start job workers on startup: {e}")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Flush pending HTTP cache writes and close pooled scraper connections"""
+    # Only if a scraper actually imported the shared client; no need to open its cache just to close it
+    http_client_module = sys.modules.get("core.http_client")
+    if http_client_module is not None:
+        try:
+            await http_client_module.get_http_client().aclose()
+        except Exception as e:
+            logging.error(f"Failed to close shared HTTP client: {e}")
+    try:
+        await close_shared_calculator()
+    except Exception as e:
+        logging.error(f"Failed to close nutrition FDC client: {e}")
+
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "message": "Server is running"}
@@ -152,6 +168,8 @@ if __name__ == "__main__":
             host="127.0.0.1",
             port=PORT,
             reload=True,
+            # "auto" picks uvloop when it is installed; USE_UVLOOP=0 forces the stock asyncio loop
+            loop="auto" if os.getenv("USE_UVLOOP", "1") != "0" else "asyncio",
             reload_excludes=[
                 "stable-diffusion-webui/*",
                 "stable-diffusion-webui/venv/*",
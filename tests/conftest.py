@@ -0,0 +1,12 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+# core.database opens users.db (and core.http_client its cache) relative to the
+# working directory, so the suite runs from a scratch directory instead of the repo.
+os.chdir(tempfile.mkdtemp(prefix="makeiteasy-tests-"))
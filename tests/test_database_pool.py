@@ -0,0 +1,64 @@
+import gc
+import logging
+import sqlite3
+import uuid
+
+import pytest
+
+from core.database import CONNECTION_POOL_SIZE, db
+
+
+@pytest.fixture
+def table():
+    name = f"pool_test_{uuid.uuid4().hex[:8]}"
+    with db.get_connection() as conn:
+        conn.execute(f"CREATE TABLE {name} (v INTEGER)")
+        conn.commit()
+    return name
+
+
+def _count(table):
+    with db.get_connection() as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_uncommitted_write_is_rolled_back_on_exit(table):
+    with db.get_connection() as conn:
+        conn.execute(f"INSERT INTO {table} (v) VALUES (1)")
+    assert _count(table) == 0
+
+    with db.get_connection() as conn:
+        conn.execute(f"INSERT INTO {table} (v) VALUES (2)")
+        conn.commit()
+    assert _count(table) == 1
+
+
+def test_pool_never_grows_past_its_size():
+    handles = [db.get_connection() for _ in range(CONNECTION_POOL_SIZE + 4)]
+    for handle in handles:
+        handle.close()
+    assert db._conn_pool.qsize() == CONNECTION_POOL_SIZE
+
+
+def test_close_twice_is_noop():
+    conn = db.get_connection()
+    before = db._conn_pool.qsize()
+    conn.close()
+    conn.close()
+    assert db._conn_pool.qsize() == min(before + 1, CONNECTION_POOL_SIZE)
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute("SELECT 1")
+
+
+def test_dropped_handle_is_not_returned_to_pool(table, caplog):
+    while not db._conn_pool.empty():
+        db._conn_pool.get_nowait().close()
+    cursor = db.get_connection().cursor()
+    gc.collect()
+    # The cursor outlives its handle and must keep working on a connection nobody else has
+    cursor.execute(f"INSERT INTO {table} (v) VALUES (3)")
+    assert db._conn_pool.empty()
+    assert "without close()" in caplog.text
+    del cursor
+    gc.collect()
+    assert _count(table) == 0
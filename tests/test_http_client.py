@@ -0,0 +1,240 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+import core.http_client as http_client
+from core.http_client import AsyncHTTPClient, CachedHTTPError, _HTTPCache, _NEGATIVE_CACHE_SECONDS, _TokenBucket
+
+
+@pytest.fixture
+def transport(monkeypatch, tmp_path):
+    """Route every AsyncHTTPClient through an httpx.MockTransport calling `handler`."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(http_client, "_shared_client", None)
+    state = {"handler": None, "requests": []}
+
+    async def dispatch(request):
+        state["requests"].append(request)
+        return await state["handler"](request)
+
+    monkeypatch.setattr(
+        AsyncHTTPClient, "_new_client",
+        staticmethod(lambda http2, limits: httpx.AsyncClient(transport=httpx.MockTransport(dispatch))),
+    )
+    return state
+
+
+def test_shared_client_is_created_lazily_per_loop(transport, tmp_path):
+    async def handler(request):
+        return httpx.Response(200, text="<html>ok</html>")
+    transport["handler"] = handler
+
+    async def fetch():
+        html = await http_client.get_html("https://example.com/a")
+        client = http_client.get_http_client()
+        await client.aclose()
+        return client, html
+
+    assert not (tmp_path / "http_cache.db").exists()
+    first, html = asyncio.run(fetch())
+    assert html == "<html>ok</html>"
+    # A second event loop gets its own client instead of one bound to the closed loop
+    second, _ = asyncio.run(fetch())
+    assert first is not second
+    assert (tmp_path / "http_cache.db").exists()
+
+
+def test_cache_connects_on_first_use(tmp_path):
+    cache = _HTTPCache(str(tmp_path / "cache.db"))
+    assert not (tmp_path / "cache.db").exists()
+    assert cache.get("https://example.com/missing") is None
+    assert (tmp_path / "cache.db").exists()
+    cache.close()
+
+
+@pytest.fixture
+def client(transport, tmp_path):
+    client = AsyncHTTPClient()
+    client._cache = _HTTPCache(str(tmp_path / "client_cache.db"))
+    return client
+
+
+def test_concurrent_get_html_shares_one_request(transport, client):
+    async def run():
+        release = asyncio.Event()
+
+        async def handler(request):
+            await release.wait()
+            return httpx.Response(200, text="<html>shared</html>")
+        transport["handler"] = handler
+
+        callers = [asyncio.create_task(client.get_html("https://example.com/shared")) for _ in range(5)]
+        await asyncio.sleep(0.05)
+        callers[0].cancel()
+        release.set()
+        results = await asyncio.gather(*callers, return_exceptions=True)
+        await client.aclose()
+        return results
+
+    results = asyncio.run(run())
+    assert len(transport["requests"]) == 1
+    # Cancelling one caller leaves the shared fetch running for the others
+    assert isinstance(results[0], asyncio.CancelledError)
+    assert results[1:] == ["<html>shared</html>"] * 4
+
+
+def test_failed_fetch_is_removed_from_inflight(transport, client):
+    async def run():
+        async def failing(request):
+            raise ValueError("boom")
+        transport["handler"] = failing
+        results = await asyncio.gather(
+            *(client.get_html("https://example.com/flaky") for _ in range(3)), return_exceptions=True
+        )
+        await asyncio.sleep(0)
+        inflight_after_failure = dict(client._inflight)
+
+        async def ok(request):
+            return httpx.Response(200, text="<html>back</html>")
+        transport["handler"] = ok
+        html = await client.get_html("https://example.com/flaky")
+        await client.aclose()
+        return results, inflight_after_failure, html
+
+    results, inflight_after_failure, html = asyncio.run(run())
+    assert all(isinstance(r, ValueError) for r in results)
+    assert inflight_after_failure == {}
+    assert html == "<html>back</html>"
+    assert len(transport["requests"]) == 2
+
+
+def _age_cached_row(cache, url, seconds):
+    now = int(time.time())
+    with cache._lock:
+        cache._connection().execute(
+            "UPDATE http_cache SET fetched_ts = ?, fetched_at = ? WHERE url = ?",
+            (now - seconds, "2000-01-01T00:00:00", url),
+        )
+
+
+async def _fresh_page(request):
+    return httpx.Response(200, text="<html>fresh</html>")
+
+
+def test_cached_404_fails_fast_without_network(transport, client):
+    transport["handler"] = _fresh_page
+    client._cache.upsert("https://example.com/gone", None, None, 404, None)
+    with pytest.raises(CachedHTTPError) as exc:
+        asyncio.run(client.get_html("https://example.com/gone"))
+    assert exc.value.status == 404
+    assert transport["requests"] == []
+
+
+@pytest.mark.parametrize("status", [429, 503])
+def test_cached_transient_error_is_refetched(transport, client, status):
+    transport["handler"] = _fresh_page
+    client._cache.upsert("https://example.com/busy", None, None, status, None)
+
+    async def run():
+        html = await client.get_html("https://example.com/busy")
+        await client.aclose()
+        return html
+
+    assert asyncio.run(run()) == "<html>fresh</html>"
+    assert len(transport["requests"]) == 1
+
+
+def test_negative_entry_expires(transport, client):
+    transport["handler"] = _fresh_page
+    url = "https://example.com/was-gone"
+    client._cache.upsert(url, None, None, 404, None)
+    _age_cached_row(client._cache, url, _NEGATIVE_CACHE_SECONDS - 60)
+    with pytest.raises(CachedHTTPError):
+        asyncio.run(client.get_html(url))
+
+    _age_cached_row(client._cache, url, _NEGATIVE_CACHE_SECONDS + 1)
+
+    async def run():
+        html = await client.get_html(url)
+        await client.aclose()
+        return html
+
+    assert asyncio.run(run()) == "<html>fresh</html>"
+    assert len(transport["requests"]) == 1
+
+
+def test_negative_cache_reads_integer_fetched_ts(client):
+    url = "https://example.com/missing-page"
+    client._cache.upsert(url, None, None, 404, None)
+    fetched_ts = client._cache.get(url)[3]
+    assert isinstance(fetched_ts, int)
+    assert abs(fetched_ts - time.time()) < 5
+    # The ISO fetched_at column is for humans only; an ancient value does not expire the entry
+    _age_cached_row(client._cache, url, 0)
+    with pytest.raises(CachedHTTPError):
+        asyncio.run(client.get_html(url))
+
+
+class _FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _FakeClock()
+    monkeypatch.setattr(_TokenBucket, "_clock", staticmethod(clock))
+    monkeypatch.setattr(http_client.asyncio, "sleep", clock.sleep)
+    return clock
+
+
+def _acquire(bucket, times=1):
+    async def run():
+        for _ in range(times):
+            await bucket.acquire()
+    asyncio.run(run())
+
+
+def test_token_bucket_refills_at_rate(clock):
+    bucket = _TokenBucket(4)
+    _acquire(bucket, 4)
+    assert clock.sleeps == []
+    _acquire(bucket)
+    assert clock.sleeps == [pytest.approx(0.25)]
+    # Idle time refills the burst, capped at `rate`
+    clock.now += 10
+    _acquire(bucket, 4)
+    assert len(clock.sleeps) == 1
+
+
+def test_token_bucket_throttle_and_restore(clock):
+    bucket = _TokenBucket(4)
+    bucket.throttle(1, 10)
+    _acquire(bucket)
+    # Retry-After window: the burst is dropped and one request waits the whole window
+    assert clock.sleeps == [pytest.approx(10)]
+    assert bucket._throttled_until == 0.0
+    assert (bucket.rate, bucket.per) == (4, 1.0)
+    _acquire(bucket)
+    assert clock.sleeps[1:] == [pytest.approx(0.25)]
+
+
+def test_token_bucket_stays_throttled_inside_window(clock):
+    bucket = _TokenBucket(4)
+    bucket.throttle(1, 30)
+    clock.now += 20
+    _acquire(bucket)
+    # Tokens accrue at the throttled rate until throttled_until passes
+    assert clock.sleeps == [pytest.approx(10)]
+    assert clock.now >= 1030
+    assert (bucket.rate, bucket.per) == (4, 1.0)
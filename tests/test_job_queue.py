@@ -0,0 +1,163 @@
+import asyncio
+import sqlite3
+import uuid
+from collections import OrderedDict, deque
+
+import pytest
+
+import logic.job_queue as job_queue
+from core.database import db
+from models.types import UserCreate
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Fresh queue state per test, with the safe-mode calculator stubbed out."""
+    monkeypatch.setattr(job_queue, "_jobs", deque())
+    monkeypatch.setattr(job_queue, "_jobs_ready", asyncio.Event())
+    monkeypatch.setattr(job_queue, "_pending", set())
+    monkeypatch.setattr(job_queue, "_pending_writes", [])
+    monkeypatch.setattr(job_queue, "_pending_flush_lock", asyncio.Lock())
+    monkeypatch.setattr(job_queue, "_pending_flush_task", None)
+    monkeypatch.setattr(job_queue, "_result_cache", OrderedDict())
+    calls = []
+
+    async def safe_snapshot(raw_items, servings):
+        calls.append((raw_items, servings))
+        return {"perServing": {"calories": 120.0, "protein": 5.0, "fat": 3.0, "carbs": 10.0}, "meta": {}}
+
+    def full_calculator():
+        raise AssertionError("full calculator should not run")
+
+    monkeypatch.setattr(job_queue, "compute_safe_snapshot", safe_snapshot)
+    monkeypatch.setattr(job_queue, "get_shared_calculator", full_calculator)
+    return calls
+
+
+def _save_recipe(ingredients=("2 eggs", "1 dl milk")):
+    email = f"queue-{uuid.uuid4().hex[:8]}@example.com"
+    user = db.create_user(UserCreate(email=email, full_name="Queue Test", password="secret1"))
+    recipe = db.save_recipe(user.id, "https://example.com/r", {
+        'title': 'Pancakes', 'ingredients': list(ingredients), 'instructions': ['Whisk'], 'servings': '2',
+    })
+    return recipe.id
+
+
+async def _run_worker(until, timeout=5.0):
+    """Run one worker_loop until `until()` holds, then stop it."""
+    worker = asyncio.create_task(job_queue.worker_loop())
+    try:
+        deadline = asyncio.get_running_loop().time() + timeout
+        while not until():
+            assert asyncio.get_running_loop().time() < deadline, "worker did not finish in time"
+            await asyncio.sleep(0.01)
+    finally:
+        worker.cancel()
+        await asyncio.gather(worker, return_exceptions=True)
+
+
+def _status(recipe_id):
+    snap = db.get_nutrition_snapshot(recipe_id)
+    return snap and snap.get('status')
+
+
+def test_duplicate_enqueue_is_noop(calls):
+    rid = _save_recipe()
+
+    async def run():
+        assert await job_queue.enqueue_nutrition_compute(rid)
+        assert await job_queue.enqueue_nutrition_compute(rid)
+        assert len(job_queue._jobs) == 1
+        assert job_queue._pending_writes == [rid]
+        await _run_worker(lambda: _status(rid) == 'ready')
+
+    asyncio.run(run())
+    assert len(calls) == 1
+    assert job_queue._pending == set()
+
+
+def test_enqueue_beyond_cap_is_refused(calls):
+    async def run():
+        results = [await job_queue.enqueue_nutrition_compute(rid) for rid in range(1, job_queue._MAX_QUEUED + 2)]
+        # A recipe that is already queued is still accepted while the queue is full
+        again = await job_queue.enqueue_nutrition_compute(1)
+        return results, again
+
+    results, again = asyncio.run(run())
+    assert results[:-1] == [True] * job_queue._MAX_QUEUED
+    assert results[-1] is False
+    assert again is True
+    assert len(job_queue._jobs) == job_queue._MAX_QUEUED
+    assert job_queue._MAX_QUEUED + 1 not in job_queue._pending
+
+
+def test_force_skips_result_cache(calls):
+    rid = _save_recipe()
+
+    async def compute(force):
+        await job_queue.enqueue_nutrition_compute(rid, force=force)
+        await _run_worker(lambda: not job_queue._jobs and _status(rid) == 'ready')
+
+    async def run():
+        await compute(False)
+        assert len(calls) == 1
+        await compute(False)
+        # Unchanged ingredients are served from the result cache
+        assert len(calls) == 1
+        assert db.get_nutrition_snapshot(rid)['meta'].get('cached') is True
+        await compute(True)
+        assert len(calls) == 2
+
+    asyncio.run(run())
+
+
+def test_force_upgrades_queued_job(calls):
+    rid = _save_recipe()
+
+    async def run():
+        await job_queue.enqueue_nutrition_compute(rid)
+        await _run_worker(lambda: _status(rid) == 'ready')
+        await job_queue.enqueue_nutrition_compute(rid)
+        await job_queue.enqueue_nutrition_compute(rid, force=True)
+        assert list(job_queue._jobs) == [{"type": "nutrition.compute", "recipe_id": rid, "force": True}]
+        await _run_worker(lambda: not job_queue._jobs and len(calls) == 2)
+
+    asyncio.run(run())
+    assert len(calls) == 2
+
+
+def test_failed_pending_flush_does_not_strand_ids(calls, monkeypatch):
+    def locked(recipe_ids, meta=None):
+        raise sqlite3.OperationalError("database is locked")
+    monkeypatch.setattr(db, "bulk_upsert_pending", locked)
+    rids = [_save_recipe(), _save_recipe(("3 eggs",))]
+
+    async def run():
+        for rid in rids:
+            assert await job_queue.enqueue_nutrition_compute(rid)
+        await _run_worker(lambda: all(_status(rid) == 'ready' for rid in rids))
+
+    asyncio.run(run())
+    assert len(calls) == 2
+    assert job_queue._pending == set()
+    assert job_queue._pending_writes == []
+
+
+@pytest.mark.parametrize("value, expected", [
+    (3, 3),
+    ("3", 3),
+    (" 6 ", 6),
+    (2.0, 2),
+    (2.5, 4),
+    (float("nan"), 4),
+    ("2.5", 4),
+    ("fyra", 4),
+    (0, 4),
+    (-1, 4),
+    ("-1", 4),
+    (None, 4),
+    (True, 4),
+    (False, 4),
+])
+def test_coerce_servings(value, expected):
+    assert job_queue._coerce_servings(value) == expected
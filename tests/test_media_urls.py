@@ -0,0 +1,73 @@
+import json
+import uuid
+
+import pytest
+
+from core.config import settings
+from core.database import db
+from models.types import UserCreate
+
+
+def _stored_content(recipe_id):
+    with db._acquire_read() as conn:
+        row = conn.execute("SELECT recipe_content FROM saved_recipes WHERE id = ?", (recipe_id,)).fetchone()
+    return json.loads(row[0])
+
+
+def _media_fields(content):
+    if isinstance(content, dict):
+        return content['image_url'], content['thumbnail_path'], content['instructions'][0]['image_path']
+    return content.image_url, content.thumbnail_path, content.instructions[0].image_path
+
+
+@pytest.fixture
+def user():
+    email = f"media-{uuid.uuid4().hex[:8]}@example.com"
+    return db.create_user(UserCreate(email=email, full_name="Media Test", password="secret1"))
+
+
+@pytest.mark.parametrize("base", ["https://cdn.example.com", ""])
+def test_media_paths_round_trip(monkeypatch, user, base):
+    monkeypatch.setattr(settings, "MEDIA_BASE_URL", base)
+    paths = ("/images/dish.png", "/images/thumb.png", "/downloads/step1.jpg")
+
+    saved = db.save_recipe(user.id, "https://example.com/r", {
+        'title': 'Media round trip',
+        'ingredients': ['1 egg'],
+        'instructions': [{'step': 1, 'description': 'Cook', 'image_path': f"{base}{paths[2]}"}],
+        'image_url': f"{base}{paths[0]}",
+        'thumbnail_path': f"{base}{paths[1]}",
+    })
+    assert _media_fields(_stored_content(saved.id)) == paths
+    assert _media_fields(saved.recipe_content) == tuple(f"{base}{p}" for p in paths)
+
+    read = db.get_saved_recipe(saved.id)
+    assert _media_fields(read.recipe_content) == tuple(f"{base}{p}" for p in paths)
+
+    # A client saving the recipe back sends the URLs exactly as it read them
+    read.recipe_content.instructions[0].image_path = f"{base}/downloads/step1-v2.jpg"
+    assert db.update_recipe_content(saved.id, user.id, read.recipe_content)
+    updated_paths = (paths[0], paths[1], "/downloads/step1-v2.jpg")
+    assert _media_fields(_stored_content(saved.id)) == updated_paths
+    assert _media_fields(db.get_saved_recipe(saved.id).recipe_content) == tuple(f"{base}{p}" for p in updated_paths)
+
+
+def test_local_backend_origin_is_stripped_on_save(monkeypatch, user):
+    monkeypatch.setattr(settings, "MEDIA_BASE_URL", "https://cdn.example.com")
+    saved = db.save_recipe(user.id, "https://example.com/r", {
+        'title': 'Legacy origin',
+        'ingredients': ['1 egg'],
+        'instructions': [{'step': 1, 'description': 'Cook', 'image_path': 'http://localhost:8000/images/s.png'}],
+        'image_url': 'http://127.0.0.1:8001/images/a.png',
+        'thumbnail_path': 'https://other.example.com/images/a.png',
+    })
+    assert _media_fields(_stored_content(saved.id)) == (
+        '/images/a.png', 'https://other.example.com/images/a.png', '/images/s.png'
+    )
+
+
+def test_update_recipe_content_checks_owner(user):
+    saved = db.save_recipe(user.id, "https://example.com/r", {
+        'title': 'Owner only', 'ingredients': ['1 egg'], 'instructions': ['Cook'],
+    })
+    assert not db.update_recipe_content(saved.id, user.id + 1000, saved.recipe_content)
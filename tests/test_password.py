@@ -0,0 +1,44 @@
+import hashlib
+import uuid
+
+import bcrypt
+import pytest
+
+from core.database import db
+from core.password import get_password_hash, needs_rehash, verify_password
+from models.types import UserCreate
+
+
+def _legacy_hash(password, salt="a1b2c3"):
+    return f"{salt}:{hashlib.sha256((password + salt).encode('utf-8')).hexdigest()}"
+
+
+def test_legacy_hash_verifies_and_needs_rehash():
+    hashed = _legacy_hash("hemligt")
+    assert verify_password("hemligt", hashed)
+    assert not verify_password("fel", hashed)
+    assert needs_rehash(hashed)
+
+
+@pytest.mark.parametrize("hashed", ["$2b$12$inte-en-riktig-hash", "$2b$", "$2a$xx$" + "." * 53])
+def test_malformed_bcrypt_hash_returns_false(hashed):
+    assert verify_password("hemligt", hashed) is False
+
+
+def test_low_cost_bcrypt_hash_needs_rehash():
+    hashed = bcrypt.hashpw(b"hemligt", bcrypt.gensalt(rounds=10)).decode()
+    assert verify_password("hemligt", hashed)
+    assert needs_rehash(hashed)
+    assert not needs_rehash(get_password_hash("hemligt"))
+
+
+def test_authenticate_user_upgrades_legacy_hash():
+    email = f"legacy-{uuid.uuid4().hex[:8]}@example.com"
+    user = db.create_user(UserCreate(email=email, full_name="Legacy", password="hemligt"))
+    db.update_password(user.id, _legacy_hash("hemligt"))
+
+    assert db.authenticate_user(email, "hemligt").id == user.id
+    stored = db.get_user_by_email(email).hashed_password
+    assert stored.startswith("$2b$12$")
+    assert not needs_rehash(stored)
+    assert db.authenticate_user(email, "hemligt").id == user.id